@@ -0,0 +1,352 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_PATH = os.environ.get("ADAPTIVE_DB_PATH") or data_path("adaptive.db")
+
+# Rasch model: P(correct) = sigmoid(ability of the item's skill - item difficulty).
+# Abilities and difficulties start at the prior mean 0 with these prior variances.
+ABILITY_PRIOR_VARIANCE = 1.0
+DIFFICULTY_PRIOR_VARIANCE = 1.0
+# How strongly selection favours weak skills: information is scaled by 1 + WEAKNESS_WEIGHT * P(miss)
+WEAKNESS_WEIGHT = float(os.environ.get("ADAPTIVE_WEAKNESS_WEIGHT", "1.0"))
+CALIBRATION_ITERATIONS = 25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS learner_ability (
+    learner TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    ability REAL NOT NULL,
+    information REAL NOT NULL,
+    answers INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (learner, skill)
+);
+CREATE TABLE IF NOT EXISTS item_difficulty (
+    item_id TEXT PRIMARY KEY,
+    difficulty REAL NOT NULL,
+    answers INTEGER NOT NULL,
+    calibrated_at REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+
+def _connect():
+    """
+    Return this thread's connection to the adaptive quiz database.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(ADAPTIVE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def skill_of(domain, topic):
+    # Topics are only unique within a domain (CAF and WAF both have an "Overview"), so the key holds both
+    return f"{domain or 'General'}:{topic or 'General'}"
+
+def skill_label(skill):
+    """
+    Display name of a skill key, e.g. "Security (WAF)".
+    """
+    domain, _, topic = skill.partition(":")
+    return f"{topic} ({domain})"
+
+class ItemPool:
+    """
+    Question ids with their skill and difficulty in NumPy arrays, plus a per-skill index of
+    item positions sorted by difficulty. Under the Rasch model the most informative item of a
+    skill is the one whose difficulty is closest to the learner's ability, so selection is a
+    binary search per skill rather than a scan of the whole pool.
+    """
+
+    def __init__(self, ids, skills, difficulty=None, seed=None):
+        self.ids = list(ids)
+        self.position = {item_id: position for position, item_id in enumerate(self.ids)}
+        self.skills = sorted(set(skills))
+        self.skill_index = {skill: index for index, skill in enumerate(self.skills)}
+        self.item_skill = np.fromiter((self.skill_index[skill] for skill in skills), dtype=np.int32, count=len(self.ids))
+        self.difficulty = np.zeros(len(self.ids), dtype=np.float32) if difficulty is None else np.asarray(difficulty, dtype=np.float32)
+        self._tiebreak = np.random.default_rng(seed).random(len(self.ids))
+        self._build_index()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build_index(self):
+        # Items of equal difficulty are ordered randomly, so uncalibrated pools are not walked in file order
+        order = np.lexsort((self._tiebreak, self.difficulty, self.item_skill))
+        bounds = np.searchsorted(self.item_skill[order], np.arange(len(self.skills) + 1))
+        self.by_skill = [order[bounds[k]:bounds[k + 1]] for k in range(len(self.skills))]
+        self.sorted_difficulty = [self.difficulty[items] for items in self.by_skill]
+
+    @classmethod
+    def from_library(cls, library, kind="questions"):
+        """
+        Pool of every `kind` item of a ContentLibrary, built from its index without reading the packs.
+        Difficulties from the last calibration are applied when available.
+        """
+        ids = []
+        skills = []
+        for pack in library.packs:
+            if pack.kind != kind:
+                continue
+            facet_of = {}
+            for facet in ("domain", "topic"):
+                values = [""] * len(pack)
+                for value, positions in pack.facets[facet].items():
+                    for position in positions:
+                        values[position] = value
+                facet_of[facet] = values
+            ids.extend(pack.ids)
+            skills.extend(skill_of(domain, topic) for domain, topic in zip(facet_of["domain"], facet_of["topic"]))
+        pool = cls(ids, skills)
+        pool.load_calibration()
+        return pool
+
+    def load_calibration(self):
+        try:
+            rows = _connect().execute("SELECT item_id, difficulty FROM item_difficulty").fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load item difficulties: {str(e)}")
+            return
+        known = [(self.position[item_id], difficulty) for item_id, difficulty in rows if item_id in self.position]
+        if known:
+            positions, difficulties = zip(*known)
+            self.difficulty[list(positions)] = difficulties
+            self._build_index()
+
+class AdaptiveSelector:
+    """
+    Per-learner ability estimates over the pool's skills, with the next question chosen for
+    the most Fisher information, weighted towards the learner's weakest skills.
+
+    Abilities are updated after every answer with one Newton step of the Rasch likelihood
+    (the step shrinks as information about the skill accumulates) and written through to SQLite.
+    """
+
+    def __init__(self, pool, learner):
+        self.pool = pool
+        self.learner = learner
+        skills = len(pool.skills)
+        self.ability = np.zeros(skills, dtype=np.float32)
+        self.information = np.full(skills, 1.0 / ABILITY_PRIOR_VARIANCE, dtype=np.float32)
+        self.answers = np.zeros(skills, dtype=np.int32)
+        self.asked = np.zeros(len(pool), dtype=bool)
+        self._lock = threading.Lock()
+        for skill, ability, information, answers in _connect().execute(
+            "SELECT skill, ability, information, answers FROM learner_ability WHERE learner = ?", (learner,)
+        ):
+            index = pool.skill_index.get(skill)
+            if index is not None:
+                self.ability[index] = ability
+                self.information[index] = information
+                self.answers[index] = answers
+
+    def new_quiz(self):
+        """
+        Forget which items were asked, so a new quiz can draw from the whole pool again.
+        """
+        with self._lock:
+            self.asked[:] = False
+
+    def _nearest_unasked(self, skill):
+        items = self.pool.by_skill[skill]
+        if not len(items):
+            return None
+        difficulties = self.pool.sorted_difficulty[skill]
+        right = int(np.searchsorted(difficulties, self.ability[skill]))
+        left = right - 1
+        target = self.ability[skill]
+        # Walk outwards from the ability; only items already asked this quiz are skipped
+        while left >= 0 or right < len(items):
+            if right >= len(items) or (left >= 0 and target - difficulties[left] <= difficulties[right] - target):
+                candidate = items[left]
+                left -= 1
+            else:
+                candidate = items[right]
+                right += 1
+            if not self.asked[candidate]:
+                return int(candidate)
+        return None
+
+    def next_item(self):
+        """
+        Id of the unasked item with the highest weighted information, or None when all were asked.
+        """
+        with self._lock:
+            best = None
+            best_score = -1.0
+            ties = 0
+            for skill in range(len(self.pool.skills)):
+                position = self._nearest_unasked(skill)
+                if position is None:
+                    continue
+                p = _sigmoid(float(self.ability[skill] - self.pool.difficulty[position]))
+                score = p * (1.0 - p) * (1.0 + WEAKNESS_WEIGHT * (1.0 - _sigmoid(float(self.ability[skill]))))
+                if score > best_score + 1e-12:
+                    best, best_score, ties = position, score, 1
+                elif abs(score - best_score) <= 1e-12:
+                    # Reservoir-sample among equally good skills
+                    ties += 1
+                    if random.random() < 1.0 / ties:
+                        best = position
+            if best is None:
+                return None
+            self.asked[best] = True
+            return self.pool.ids[best]
+
+    def update(self, item_id, correct):
+        """
+        Record an answer to `item_id` and update the ability of its skill. Returns the new ability.
+        """
+        position = self.pool.position.get(item_id)
+        if position is None:
+            return None
+        skill = int(self.pool.item_skill[position])
+        with self._lock:
+            self.asked[position] = True
+            p = _sigmoid(float(self.ability[skill] - self.pool.difficulty[position]))
+            self.information[skill] += p * (1.0 - p)
+            self.ability[skill] += ((1.0 if correct else 0.0) - p) / self.information[skill]
+            self.answers[skill] += 1
+            row = (self.learner, self.pool.skills[skill], float(self.ability[skill]),
+                   float(self.information[skill]), int(self.answers[skill]), time.time())
+        conn = _connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO learner_ability (learner, skill, ability, information, answers, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                row
+            )
+        return row[2]
+
+    def mastery(self):
+        """
+        (skill, probability of answering an average-difficulty item correctly) for every skill
+        the learner has answered, weakest first.
+        """
+        probabilities = _sigmoid(self.ability).tolist()
+        answered = [(skill, probabilities[index]) for index, skill in enumerate(self.pool.skills) if self.answers[index]]
+        return sorted(answered, key=lambda pair: pair[1])
+
+class Calibration(NamedTuple):
+    difficulty: np.ndarray
+    item_answers: np.ndarray
+    learner: np.ndarray
+    skill: np.ndarray
+    ability: np.ndarray
+    information: np.ndarray
+    answers: np.ndarray
+
+def calibrate(learners, items, correct, item_skill, difficulty, iterations=CALIBRATION_ITERATIONS):
+    """
+    Jointly estimate (learner, skill) abilities and item difficulties from answer history with
+    MAP Newton steps on the Rasch likelihood, vectorized over all answers with bincount.
+
+    `learners`, `items` and `correct` are parallel arrays with one entry per answer (learner
+    index, item position, 0/1); `difficulty` holds the current difficulty of every item.
+    Items nobody answered keep their difficulty. Abilities are returned per (learner, skill) pair.
+    """
+    items = np.asarray(items, dtype=np.int64)
+    correct = np.asarray(correct, dtype=np.float64)
+    item_skill = np.asarray(item_skill, dtype=np.int64)
+    stride = int(item_skill.max(initial=0)) + 1
+    pairs, pair_of_answer = np.unique(np.asarray(learners, dtype=np.int64) * stride + item_skill[items], return_inverse=True)
+    difficulty = np.asarray(difficulty, dtype=np.float64).copy()
+    ability = np.zeros(len(pairs))
+    item_answers = np.bincount(items, minlength=len(difficulty))
+    seen = item_answers > 0
+    for _ in range(iterations):
+        p = _sigmoid(ability[pair_of_answer] - difficulty[items])
+        gradient = np.bincount(pair_of_answer, correct - p, len(pairs)) - ability / ABILITY_PRIOR_VARIANCE
+        ability += gradient / (np.bincount(pair_of_answer, p * (1.0 - p), len(pairs)) + 1.0 / ABILITY_PRIOR_VARIANCE)
+        p = _sigmoid(ability[pair_of_answer] - difficulty[items])
+        gradient = np.bincount(items, p - correct, len(difficulty)) - difficulty / DIFFICULTY_PRIOR_VARIANCE
+        step = gradient / (np.bincount(items, p * (1.0 - p), len(difficulty)) + 1.0 / DIFFICULTY_PRIOR_VARIANCE)
+        difficulty[seen] += step[seen]
+    p = _sigmoid(ability[pair_of_answer] - difficulty[items])
+    return Calibration(
+        difficulty=difficulty.astype(np.float32),
+        item_answers=item_answers,
+        learner=pairs // stride,
+        skill=pairs % stride,
+        ability=ability,
+        information=np.bincount(pair_of_answer, p * (1.0 - p), len(pairs)) + 1.0 / ABILITY_PRIOR_VARIANCE,
+        answers=np.bincount(pair_of_answer, minlength=len(pairs))
+    )
+
+def recalibrate(library, store, quiz):
+    """
+    Recalibrate item difficulties and learner abilities from every recorded answer of `quiz`
+    (answers are matched to pool items by question text) and save both. Returns the updated pool.
+    """
+    pool = ItemPool.from_library(library)
+    text_position = {item["question"]: pool.position[item["id"]] for item in library.items("questions") if item.get("id") in pool.position}
+    rows = [(learner, text_position.get(question), correct) for learner, question, correct in store.answers(quiz)]
+    rows = [row for row in rows if row[1] is not None]
+    if not rows:
+        logger.info("No recorded answers match the question pool; nothing to calibrate.")
+        return pool
+    learner_names = sorted({learner for learner, _, _ in rows})
+    learner_index = {learner: index for index, learner in enumerate(learner_names)}
+    started = time.perf_counter()
+    result = calibrate(
+        np.fromiter((learner_index[learner] for learner, _, _ in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((position for _, position, _ in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((correct for _, _, correct in rows), dtype=np.float64, count=len(rows)),
+        pool.item_skill,
+        pool.difficulty
+    )
+    logger.info(
+        f"Calibrated {int(np.count_nonzero(result.item_answers))} items and {len(result.ability)} learner skills "
+        f"from {len(rows)} answers in {time.perf_counter() - started:.3f}s."
+    )
+
+    now = time.time()
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO item_difficulty (item_id, difficulty, answers, calibrated_at) VALUES (?, ?, ?, ?)",
+            [
+                (pool.ids[position], float(result.difficulty[position]), int(result.item_answers[position]), now)
+                for position in np.flatnonzero(result.item_answers)
+            ]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO learner_ability (learner, skill, ability, information, answers, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (learner_names[learner], pool.skills[skill], float(ability), float(information), int(answers), now)
+                for learner, skill, ability, information, answers in zip(
+                    result.learner, result.skill, result.ability, result.information, result.answers
+                )
+            ]
+        )
+    pool.difficulty = result.difficulty
+    pool._build_index()
+    return pool
+
+if __name__ == "__main__":
+    from content_packs import ContentLibrary
+    from progress_store import QUIZ_STATIC, get_progress_store
+
+    logging.basicConfig(level=logging.INFO)
+    recalibrate(ContentLibrary(), get_progress_store(), QUIZ_STATIC)
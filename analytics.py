@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from progress_store import DAILY_COLUMNS
+
+# The usage guide's goal: above 80% per domain
+TARGET_ACCURACY = 0.8
+TREND_DAYS = 7
+
+def daily_frame(rows):
+    """
+    DataFrame of answer_daily rows with categorical learner/domain and a datetime day.
+    """
+    df = pd.DataFrame.from_records(rows, columns=list(DAILY_COLUMNS))
+    df["learner"] = df["learner"].astype("category")
+    df["domain"] = df["domain"].astype("category")
+    df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d")
+    return df
+
+def _rates(df):
+    # Accuracy and seconds per timed answer from summed counts; empty groups give NaN
+    df["accuracy"] = df["correct"] / df["answers"].where(df["answers"] > 0)
+    df["seconds_per_question"] = df["seconds"] / df["timed"].where(df["timed"] > 0)
+    return df
+
+def domain_summary(df, today=None):
+    """
+    Per-domain totals of one learner's daily rows: answers, accuracy, seconds per question,
+    whether the target accuracy is met, and the trend (accuracy over the last TREND_DAYS days
+    minus the TREND_DAYS days before).
+    """
+    today = pd.Timestamp.now().normalize() if today is None else pd.Timestamp(today)
+    recent_start = today - pd.Timedelta(days=TREND_DAYS - 1)
+    earlier_start = recent_start - pd.Timedelta(days=TREND_DAYS)
+    period = np.select(
+        [df["day"] >= recent_start, df["day"] >= earlier_start],
+        ["recent", "earlier"],
+        default="older"
+    )
+    counts = ["answers", "correct", "timed", "seconds"]
+    summary = _rates(df.groupby("domain", observed=True)[counts].sum())
+    by_period = df.groupby([df["domain"], period], observed=True)[["answers", "correct"]].sum()
+    by_period = (by_period["correct"] / by_period["answers"]).unstack().reindex(columns=["recent", "earlier"])
+    summary["trend"] = (by_period["recent"] - by_period["earlier"]).reindex(summary.index)
+    summary["target_met"] = summary["accuracy"] >= TARGET_ACCURACY
+    return summary.sort_values("accuracy")
+
+def accuracy_trend(df, window=TREND_DAYS):
+    """
+    Daily accuracy per domain, smoothed over a trailing `window`-day window weighted by answers.
+    Returns a day x domain DataFrame.
+    """
+    counts = df.pivot_table(index="day", columns="domain", values=["answers", "correct"], aggfunc="sum", observed=True)
+    days = pd.date_range(counts.index.min(), counts.index.max(), freq="D")
+    rolling = counts.reindex(days, fill_value=0).rolling(f"{window}D").sum()
+    trend = rolling["correct"] / rolling["answers"].where(rolling["answers"] > 0)
+    trend.index.name = "day"
+    return trend
+
+def learner_totals(rows):
+    """
+    Per-(domain, learner) totals and rates from ProgressStore.domain_totals() rows, for cohort_summary.
+    """
+    totals = pd.DataFrame.from_records(rows, columns=["learner", "domain", "answers", "correct", "timed", "seconds"])
+    totals = _rates(totals.set_index(["domain", "learner"]).sort_index())
+    return totals[totals["answers"] > 0]
+
+def cohort_summary(totals, learner):
+    """
+    Per-domain cohort view from learner_totals(): the cohort median accuracy and seconds per
+    question, the learner's accuracy, and the learner's percentile rank within the cohort.
+    """
+    by_domain = totals.groupby(level="domain", observed=True)
+    cohort = pd.DataFrame({
+        "learners": by_domain["accuracy"].count(),
+        "cohort_median": by_domain["accuracy"].median(),
+        "cohort_seconds_per_question": by_domain["seconds_per_question"].median()
+    })
+    # Share of the domain's learners at or below the learner's accuracy
+    ranks = by_domain["accuracy"].rank(pct=True, method="max")
+    mine = totals.index.get_level_values("learner") == learner
+    cohort["accuracy"] = totals["accuracy"][mine].droplevel("learner").reindex(cohort.index)
+    cohort["percentile"] = ranks[mine].droplevel("learner").reindex(cohort.index)
+    return cohort
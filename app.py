@@ -1,97 +1,38 @@
-import streamlit as st
-import pandas as pd
-from io import StringIO
-from euriai import EuriaiClient
-import requests
-from bs4 import BeautifulSoup
-import re
 import time
-import json
+_run_started = time.perf_counter()
+import logging
+import streamlit as st
+import hashlib
+import uuid
+import telemetry
 from app_usage import get_app_usage_instructions
+from progress_store import QUIZ_MOCK, get_progress_store
+# mock_test (LLM SDK, notes scraper, question bank) and schedule_optimizer (pandas) are
+# imported inside the sections that use them, so the page paints before they load
+
+logger = logging.getLogger(__name__)
+# No-op unless TELEMETRY_PORT is set
+telemetry.start_metrics_server()
 
 # Streamlit page configuration
 st.set_page_config(page_title="Exam Help Buddy", layout="wide")
 st.title("📚 Exam Help Buddy with LLM-Generated Mock Test")
 st.markdown("Upload your study schedule, or take a scenario-based mock test generated by an LLM!")
 
-# Retrieve the API key from Streamlit secrets
-try:
-    api_key = st.secrets["EURIAI_API_KEY"]
-except KeyError:
-    st.error("EURIAI_API_KEY not found in Streamlit secrets. Please add it to your secrets.toml or Streamlit Cloud settings.")
-    st.stop()
-
-# Initialize the EuriaiClient with Gemini 2.5 Pro Exp
-client = EuriaiClient(
-    api_key=api_key,
-    model="gemini-2.5-pro-exp-03-25"
-)
-
-# Step 1: Scrape and Preprocess the Notes from GitHub
-def scrape_github_notes(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    content = soup.find('article', class_='markdown-body')
-    text = content.get_text(separator=' ') if content else ''
-    return text
-
-def preprocess_text(text):
-    text = re.sub(r'[#*_-]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-github_url = "https://github.com/Furkan-Gulsen/aws-certified-cloud-practitioner-certification-my-notes"
-raw_notes = scrape_github_notes(github_url)
-processed_notes = preprocess_text(raw_notes)
-
-# Step 2: Generate Scenario-Based Questions Using LLM
-@st.cache_data
-def generate_mock_questions(num_questions=5):
-    prompt = f"""
-    You are an expert exam creator for the AWS Certified Cloud Practitioner (CLF-C01) exam. Using the following notes and topics, generate {num_questions} scenario-based multiple-choice questions. Each question should have 4 options, with one correct answer. Provide the question, options, correct answer, and a brief explanation.
-
-    ### Notes:
-    {processed_notes}
-
-    ### Topics to Focus On:
-    - Cloud Concepts, Digital Transformation
-    - Global Infrastructure, Cloud Architecture
-    - Shared Responsibility Model, Compute (EC2)
-    - Storage Services (S3)
-    - Databases & Networking (VPC, RDS)
-    - IAM Best Practices, Containers
-    - Governance, Serverless, ML & AI
-    - Well-Architected Framework, Billing
-
-    ### Format:
-    Return the questions in JSON format:
-    [
-        {{
-            "question": "Scenario-based question here",
-            "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-            "correct_answer": "Correct Option",
-            "explanation": "Brief explanation of the correct answer"
-        }},
-        ...
-    ]
-    """
-    response = client.generate_completion(
-        prompt=prompt,
-        temperature=0.7,
-        max_tokens=1500
-    )
-    try:
-        questions = json.loads(response)
-        return questions
-    except json.JSONDecodeError:
-        st.error("Failed to parse LLM-generated questions. Please try again.")
-        return []
+if "first_paint_ms" not in st.session_state:
+    st.session_state.first_paint_ms = (time.perf_counter() - _run_started) * 1000
+    logger.info(f"Time to first paint: {st.session_state.first_paint_ms:.0f} ms")
 
 # Step 3: Mock Test Interface
 st.subheader("Scenario-Based Real-Time Mock Test")
 st.markdown("Take a mock test with LLM-generated questions under timed conditions!")
 
+# Answers are saved per learner name
+learner = st.sidebar.text_input("Learner name", value="guest").strip() or "guest"
+
 # Initialize session state for the mock test
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if "mock_test_active" not in st.session_state:
     st.session_state.mock_test_active = False
 if "current_question" not in st.session_state:
@@ -104,80 +45,108 @@ if "start_time" not in st.session_state:
     st.session_state.start_time = None
 if "mock_questions" not in st.session_state:
     st.session_state.mock_questions = []
+if "mock_stream" not in st.session_state:
+    st.session_state.mock_stream = None
+# Wrong-answer feedback is requested once per attempt, even if the request fails
+if "feedback_requested" not in st.session_state:
+    st.session_state.feedback_requested = False
+    st.session_state.feedback_error = None
 
 # Start the mock test
 if st.button("Start Mock Test"):
-    st.session_state.mock_questions = generate_mock_questions(num_questions=5)
-    if st.session_state.mock_questions:
-        st.session_state.mock_test_active = True
-        st.session_state.current_question = 0
-        st.session_state.score = 0
-        st.session_state.answers = []
-        st.session_state.start_time = time.time()
+    from mock_test import open_mock_test
+    try:
+        stream = open_mock_test(num_questions=5)
+    except KeyError:
+        # Only the mock test needs the key; the schedule section below still renders
+        st.error("EURIAI_API_KEY not found in Streamlit secrets. Please add it to your secrets.toml or Streamlit Cloud settings.")
+    else:
+        st.session_state.mock_stream = stream
+        # Shared list: questions appear here as the stream produces them
+        st.session_state.mock_questions = stream.questions
+        with st.spinner("Generating your first question..."):
+            stream.wait_for(1)
+        if st.session_state.mock_questions:
+            st.session_state.mock_test_active = True
+            st.session_state.current_question = 0
+            st.session_state.score = 0
+            st.session_state.answers = []
+            st.session_state.start_time = time.time()
+            st.session_state.feedback_requested = False
+            st.session_state.feedback_error = None
+        else:
+            st.error("Failed to generate mock test questions. Please try again.")
 
-# Mock test logic
-if st.session_state.mock_test_active and st.session_state.mock_questions:
-    total_questions = len(st.session_state.mock_questions)
+# Mock test logic: answering reruns only this fragment, not the schedule section below
+@st.fragment(run_every=1)
+def countdown():
+    # Redrawn by a one-second timer in the browser; nothing else on the page reruns
+    if not st.session_state.mock_test_active or st.session_state.start_time is None:
+        return
+    elapsed_time = time.time() - st.session_state.start_time
+    time_left = max(0, 30 - (elapsed_time % 30))
+    st.write(f"Time left for this question: {int(time_left)} seconds")
+
+def submit_answer(learner, question_index, question_data):
+    user_answer = st.session_state[f"q_{question_index}"]
+    # Grade locally: the question is multiple choice with a known correct answer
+    score = 1 if user_answer == question_data["correct_answer"] else 0
+    explanation = ("Correct. " if score == 1 else "Incorrect. ") + question_data.get("explanation", "")
+
+    get_progress_store().record(
+        learner, QUIZ_MOCK, question_data["question"], user_answer, score == 1,
+        domain=question_data.get("domain"),
+        response_seconds=time.time() - st.session_state.start_time,
+        session_id=st.session_state.session_id
+    )
+    st.session_state.answers.append({
+        "question": question_data["question"],
+        "user_answer": user_answer,
+        "correct_answer": question_data["correct_answer"],
+        "explanation": explanation,
+        "score": score
+    })
+    st.session_state.score += score
+    st.session_state.current_question += 1
+    st.session_state.start_time = time.time()  # Reset timer for next question
+
+@st.fragment
+def mock_test(learner):
+    stream = st.session_state.mock_stream
     question_index = st.session_state.current_question
+    # Only wait until the question about to be shown has been generated
+    if stream is not None and not stream.done and len(st.session_state.mock_questions) <= question_index:
+        with st.spinner("Generating the next question..."):
+            if not stream.wait_for(question_index + 1) and not stream.done:
+                st.warning("Question generation is taking longer than expected. Please try again in a moment.")
+                return
+    total_questions = stream.total if stream is not None else len(st.session_state.mock_questions)
 
     if question_index < total_questions:
         question_data = st.session_state.mock_questions[question_index]
         st.write(f"**Question {question_index + 1}/{total_questions}:** {question_data['question']}")
-        
+
         # Timer (30 seconds per question)
-        elapsed_time = time.time() - st.session_state.start_time
-        time_left = max(0, 30 - (elapsed_time % 30))
-        st.write(f"Time left for this question: {int(time_left)} seconds")
+        countdown()
 
         # Multiple-choice options
-        user_answer = st.radio("Select your answer:", question_data["options"], key=f"q_{question_index}")
-
-        # Submit answer
-        if st.button("Submit Answer"):
-            # Grade the answer using the LLM
-            prompt = f"""
-            Grade the user's answer for the following question:
-            Question: {question_data['question']}
-            Correct Answer: {question_data['correct_answer']}
-            User's Answer: {user_answer}
-
-            Provide a score (0 or 1) and a brief explanation of the grading.
-            Format:
-            {{
-                "score": 1,
-                "explanation": "Explanation of the grading"
-            }}
-            """
-            response = client.generate_completion(
-                prompt=prompt,
-                temperature=0.7,
-                max_tokens=300
-            )
-            try:
-                grading = json.loads(response)
-                score = grading["score"]
-                explanation = grading["explanation"]
-            except json.JSONDecodeError:
-                score = 1 if user_answer == question_data["correct_answer"] else 0
-                explanation = "Default grading: " + ("Correct" if score == 1 else "Incorrect")
+        st.radio("Select your answer:", question_data["options"], key=f"q_{question_index}")
 
-            st.session_state.answers.append({
-                "question": question_data["question"],
-                "user_answer": user_answer,
-                "correct_answer": question_data["correct_answer"],
-                "explanation": explanation,
-                "score": score
-            })
-            st.session_state.score += score
-            st.session_state.current_question += 1
-            st.session_state.start_time = time.time()  # Reset timer for next question
-            st.experimental_rerun()
+        # Grading in a callback moves on to the next question before the fragment is redrawn
+        st.button("Submit Answer", on_click=submit_answer, args=(learner, question_index, question_data))
 
     else:
         # End of test
         st.session_state.mock_test_active = False
         st.write("**Mock Test Completed!**")
         st.write(f"Your Score: {st.session_state.score}/{total_questions}")
+        if not st.session_state.feedback_requested:
+            with st.spinner("Preparing feedback for incorrect answers..."):
+                from mock_test import explain_wrong_answers
+                st.session_state.feedback_error = explain_wrong_answers(st.session_state.answers)
+            st.session_state.feedback_requested = True
+        if st.session_state.feedback_error:
+            st.warning(st.session_state.feedback_error)
         st.write("### Feedback:")
         for i, answer in enumerate(st.session_state.answers):
             st.write(f"**Question {i + 1}:** {answer['question']}")
@@ -194,7 +163,14 @@ if st.session_state.mock_test_active and st.session_state.mock_questions:
             st.session_state.answers = []
             st.session_state.start_time = None
             st.session_state.mock_questions = []
-            st.experimental_rerun()
+            st.session_state.mock_stream = None
+            st.session_state.feedback_requested = False
+            st.session_state.feedback_error = None
+            # The Start button is outside the fragment, so redraw the whole page
+            st.rerun()
+
+if st.session_state.mock_test_active and st.session_state.mock_questions:
+    mock_test(learner)
 
 # Existing Exam Help Buddy Code (Schedule Revision)
 default_data = """
@@ -229,13 +205,25 @@ Date,Day,Study Hours,Video Segment,Topics,Hands-On/Labs,Tips & Tricks,Status
 # File uploader for Excel file
 uploaded_file = st.file_uploader("Upload your study schedule Excel file", type=["xlsx", "xls"])
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_uploaded_schedule(digest, _data):
+    # Keyed by the upload's content hash, so reruns with an unchanged file skip parsing
+    from schedule_optimizer import read_schedule_excel
+    return read_schedule_excel(_data)
+
+@st.cache_data(show_spinner=False)
+def load_default_schedule():
+    from schedule_optimizer import read_schedule_csv
+    return read_schedule_csv(default_data)
+
 # Load data
 if uploaded_file is not None:
-    df = pd.read_excel(uploaded_file)
+    data = uploaded_file.getvalue()
+    df = load_uploaded_schedule(hashlib.sha256(data).hexdigest(), data)
     st.success("File uploaded successfully!")
 else:
     # Use default data if no file is uploaded
-    df = pd.read_csv(StringIO(default_data))
+    df = load_default_schedule()
     st.info("Using default study schedule data.")
 
 # Display the original schedule
@@ -243,30 +231,19 @@ st.subheader("Original Study Schedule")
 st.dataframe(df)
 
 # Button to generate revised schedule
+add_tips = st.checkbox("Add AI study tips (uses the LLM)", value=False)
 if st.button("Generate Revised Schedule"):
     with st.spinner("Analyzing your schedule and generating a revised plan..."):
-        prompt = f"""
-        You are an Exam Help Buddy. Below is my study schedule for two exams: AIF-C01 on 2025-05-09 and Exam #2 on 2025-05-21. Analyze the schedule, optimize study hours to prevent burnout, ensure balanced topic coverage, incorporate the tips and labs into the plan, and add short breaks and review sessions. Provide a revised daily schedule with specific tasks and tips for each day leading up to the exams.
-
-        ### Study Schedule:
-        {df.to_string(index=False)}
-
-        ### Instructions:
-        1. Optimize study hours (e.g., reduce long sessions to 3-4 hours, add 15-min breaks after every 2 hours).
-        2. Ensure balanced topic coverage across days, focusing on weaker areas.
-        3. Incorporate the 'Tips & Tricks' into daily tasks.
-        4. Add short review sessions for key concepts (e.g., 30-min review of previous day's topics).
-        5. Output a revised schedule in the format: 'Date, Day, Revised Study Hours, Tasks, Tips'.
-
-        Return the revised schedule as a table in text format.
-        """
         try:
-            response = client.generate_completion(
-                prompt=prompt,
-                temperature=0.7,
-                max_tokens=1500
-            )
-            revised_schedule = pd.read_csv(StringIO(response), sep=",")
+            from schedule_optimizer import add_llm_tips, optimize_schedule
+            # The plan itself is computed locally; the LLM only adds optional prose tips
+            revised_schedule = optimize_schedule(df)
+            if add_tips:
+                from mock_test import get_client
+                try:
+                    revised_schedule = add_llm_tips(revised_schedule, get_client())
+                except KeyError:
+                    st.warning("EURIAI_API_KEY not found; showing the revised schedule without AI study tips.")
             st.subheader("Revised Study Schedule")
             st.dataframe(revised_schedule)
             csv = revised_schedule.to_csv(index=False)
@@ -287,3 +264,6 @@ with st.expander("Click to view how to use this app and what it can do"):
 # Add a footer
 st.markdown("---")
 st.markdown("Built with ❤️ by Exam Help Buddy using Streamlit and Euriai API (Gemini 2.5 Pro Exp).")
+
+# Reruns cut short by st.stop() or a rerun request are not recorded
+telemetry.record_span("rerun", time.perf_counter() - _run_started, attributes={"app": "app"})
@@ -14,7 +14,7 @@ def get_app_usage_instructions():
     ### 1. Study Schedule Optimization
     - **Step 1**: Prepare an Excel file with your study schedule, including columns like `Date`, `Day`, `Study Hours`, `Topics`, `Hands-On/Labs`, and `Tips & Tricks`.
     - **Step 2**: Upload your Excel file using the "Upload your study schedule Excel file" section.
-    - **Step 3**: Click the "Generate Revised Schedule" button to get an optimized schedule with balanced study hours, breaks, and review sessions.
+    - **Step 3**: Click the "Generate Revised Schedule" button to get an optimized schedule with balanced study hours, breaks, and review sessions. The app's server computes the schedule itself, without calling the LLM; tick "Add AI study tips" to also get a short LLM-written tip for each day.
     - **Step 4**: Download the revised schedule as a CSV file and integrate it into your calendar or study plan.
 
     **Best Practice**: Update your Excel file with weak areas or progress notes and regenerate the schedule weekly to adapt to your needs.
@@ -31,13 +31,13 @@ def get_app_usage_instructions():
     ### 3. General Exam Preparation Tips
     - **Integrate with Your Schedule**: Use the revised schedule to plan daily study sessions, ensuring you cover all topics before the exam.
     - **Practice Regularly**: Take the mock test multiple times to build confidence and improve your score, aiming for >80% per domain (as suggested in your schedule on 2025-05-05).
-    - **Review Feedback**: After each mock test, review the LLM-graded feedback to understand your mistakes and revisit related topics in your schedule or notes.
+    - **Review Feedback**: After each mock test, review the feedback to understand your mistakes and revisit related topics in your schedule or notes.
     - **Simulate Exam Day**: On final review days (e.g., 2025-05-08), take the mock test to gauge readiness, then follow your schedule’s tips like “Arrive three min early, deep breaths, read each Q twice.”
 
     ## What This App Can Do
     - **Optimize Study Schedules**: Automatically adjust study hours to prevent burnout, add breaks, and ensure balanced topic coverage.
     - **Generate Mock Tests**: Use the Gemini 2.5 Pro Exp LLM to create scenario-based questions tailored to the AWS Certified Cloud Practitioner exam.
-    - **Grade Answers**: Automatically grade your mock test answers using the LLM, providing detailed feedback and explanations.
+    - **Grade Answers**: Instantly grade your mock test answers, with LLM-written explanations for the questions you missed at the end of the test.
     - **Support Exam Preparation**: Help you prepare for exams like AIF-C01 (2025-05-09) and Exam #2 (2025-05-21) with a structured, interactive tool.
 
     ## Requirements
@@ -0,0 +1,461 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run import _git_commit
+from benchmarks.stub_client import StubEuriaiClient, load_fixture
+
+logger = logging.getLogger("benchmarks")
+
+# AppTest swaps a process-global Runtime on every run, so it cannot drive concurrent sessions;
+# each app runs in its own `streamlit run` server instead, driven over its websocket like a browser.
+APPS = ("main.py", "app.py")
+SERVER_START_TIMEOUT = 60
+
+class StubLLMServer:
+    """
+    Local HTTP stand-in for the Euriai chat-completions endpoint, replaying the benchmark
+    fixtures (with varied question texts) after `latency` seconds. The servers under test
+    reach it through EURIAI_ENDPOINT, so their real LLM client code path is exercised.
+    """
+
+    def __init__(self, latency=0.5, chunk_delay=0.01):
+        from llm_utils import QUIZ_MODEL
+        from mock_test import MOCK_TEST_MODEL
+
+        stubs = {
+            QUIZ_MODEL: StubEuriaiClient([load_fixture("llm_quiz_response.json")], QUIZ_MODEL, latency, chunk_delay=chunk_delay, vary=True),
+            MOCK_TEST_MODEL: StubEuriaiClient([load_fixture("mock_test_response.json")], MOCK_TEST_MODEL, latency, chunk_delay=chunk_delay, vary=True),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                stub = stubs.get(payload.get("model"))
+                if stub is None:
+                    self.send_error(404, "unknown model")
+                    return
+                prompt = payload["messages"][-1]["content"]
+                if payload.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for line in stub.stream_completion(prompt):
+                        self.wfile.write(f"{line}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    return
+                body = json.dumps(stub.generate_completion(prompt)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chat/completions"
+        threading.Thread(target=self.server.serve_forever, name="stub-llm", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class AppServer:
+    """
+    `streamlit run <script>` in a child process with its own data directory and a dummy API key.
+    """
+
+    def __init__(self, script, workdir, llm_url):
+        self.script = script
+        self.port = _free_port()
+        env = dict(
+            os.environ,
+            EURIAI_ENDPOINT=llm_url,
+            EXAM_BUDDY_DATA_DIR=os.path.join(workdir, "data"),
+            LLM_CACHE_BACKEND="off"
+        )
+        # The server looks for .streamlit/secrets.toml and config.toml in its working directory
+        os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+        config = os.path.join(ROOT, ".streamlit", "config.toml")
+        if os.path.exists(config):
+            shutil.copyfile(config, os.path.join(workdir, ".streamlit", "config.toml"))
+        with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+            f.write('EURIAI_API_KEY = "load-test"\n')
+        self.log = open(os.path.join(workdir, f"{os.path.splitext(script)[0]}.log"), "wb")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, script),
+                "--server.port", str(self.port),
+                "--server.headless", "true",
+                "--server.fileWatcherType", "none",
+                "--server.enableXsrfProtection", "false",
+                "--browser.gatherUsageStats", "false"
+            ],
+            cwd=workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT
+        )
+        self.url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def wait_ready(self, timeout=SERVER_START_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.script} server exited with code {self.process.returncode}; see {self.log.name}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"{self.script} server did not start within {timeout} seconds")
+
+    def cpu_seconds(self):
+        """
+        CPU seconds used so far by the server process, including exited threads (Linux only).
+        """
+        try:
+            with open(f"/proc/{self.process.pid}/stat", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        """
+        Resident memory (MiB) and CPU seconds used so far by the server process (Linux only).
+        """
+        cpu = self.cpu_seconds()
+        try:
+            with open(f"/proc/{self.process.pid}/status", encoding="utf-8") as f:
+                rss = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration, ValueError):
+            rss = None
+        return {
+            "rss_mb": None if rss is None else round(rss, 1),
+            "cpu_seconds": None if cpu is None else round(cpu, 2)
+        }
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+class StepFailed(Exception):
+    pass
+
+class BrowserSession:
+    """
+    Minimal Streamlit websocket client: sends rerun requests with widget states the way the
+    browser does and times each rerun until its script run finishes. Like the browser, a
+    button inside an st.fragment reruns only that fragment; run_every timers are not emulated.
+    """
+
+    def __init__(self, script, url, timeout):
+        self.script = script
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}
+        self.elements = {}
+        # Widget id -> id of the fragment that rendered it
+        self.fragments = {}
+        self.exceptions = []
+        self.page_script_hash = ""
+        self.ws = None
+
+    async def __aenter__(self):
+        import websockets
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.ws.close()
+
+    def _collect(self, msg):
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.page_script_hash = msg.new_session.page_script_hash
+            self.exceptions = []
+            # A fragment run only replaces the fragment's elements
+            if not msg.new_session.fragment_ids_this_run:
+                self.elements = {}
+                self.fragments = {}
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type == "exception":
+                self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+            elif element_type in ("button", "selectbox", "radio", "text_input"):
+                widget = getattr(element, element_type)
+                self.elements[(element_type, widget.label)] = widget
+                if msg.delta.fragment_id:
+                    self.fragments[widget.id] = msg.delta.fragment_id
+
+    async def rerun(self, triggers=(), fragment_id=None):
+        """
+        Rerun the script, or only the fragment `fragment_id`, with the current widget values
+        plus one-shot button `triggers`; returns the rerun latency in milliseconds.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        back_msg = BackMsg()
+        back_msg.rerun_script.query_string = ""
+        back_msg.rerun_script.page_script_hash = self.page_script_hash
+        if fragment_id:
+            back_msg.rerun_script.fragment_id = fragment_id
+        for state in self.widgets.values():
+            back_msg.rerun_script.widget_states.widgets.append(state)
+        for widget_id in triggers:
+            back_msg.rerun_script.widget_states.widgets.add(id=widget_id, trigger_value=True)
+        started = time.perf_counter()
+        await self.ws.send(back_msg.SerializeToString())
+        while True:
+            data = await asyncio.wait_for(self.ws.recv(), self.timeout)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            self._collect(msg)
+            if msg.WhichOneof("type") == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return (time.perf_counter() - started) * 1000
+
+    def widget(self, element_type, label):
+        widget = self.elements.get((element_type, label))
+        if widget is None:
+            raise StepFailed(f"no {element_type} '{label}'")
+        return widget
+
+    def set_value(self, element_type, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        widget = self.widget(element_type, label)
+        self.widgets[widget.id] = WidgetState(id=widget.id, string_value=value)
+
+class SimulatedLearner:
+    """
+    One learner walking Home → Flashcards → Static Quiz → LLM Quiz in main.py and
+    then through a mock test in app.py, with each rerun timed.
+    """
+
+    def __init__(self, index, urls, think_time=0.0, timeout=120, cpu_probes=None):
+        self.learner = f"load-{index}"
+        self.urls = urls
+        self.think_time = think_time
+        self.timeout = timeout
+        # Script -> callable returning its server's CPU seconds, to charge each step its CPU;
+        # only meaningful while this learner is alone on the servers
+        self.cpu_probes = cpu_probes
+        self.timings = []
+        self.cpu = []
+        self.errors = []
+
+    async def _step(self, session, name, triggers=(), fragment_id=None):
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+        probe = self.cpu_probes and self.cpu_probes[session.script]
+        cpu_before = probe() if probe else None
+        self.timings.append((name, await session.rerun(triggers, fragment_id)))
+        if probe:
+            self.cpu.append((name, (probe() - cpu_before) * 1000))
+        if session.exceptions:
+            raise StepFailed(f"{name}: {session.exceptions[0]}")
+
+    async def _click(self, session, name, label):
+        button = session.widget("button", label)
+        await self._step(session, name, [button.id], session.fragments.get(button.id))
+
+    async def _answer(self, session, name, label):
+        radio = session.widget("radio", label)
+        session.set_value("radio", label, radio.options[0])
+        await self._click(session, name, "Submit Answer")
+
+    async def walk_main(self):
+        async with BrowserSession("main.py", self.urls["main.py"], self.timeout) as session:
+            await self._step(session, "main_home")
+            session.set_value("text_input", "Learner name", self.learner)
+            await self._step(session, "main_login")
+            session.set_value("selectbox", "Choose a Page", "Flashcards")
+            await self._step(session, "flashcards")
+            await self._click(session, "flashcard_flip", "Flip Card")
+            await self._click(session, "flashcard_grade", "Good")
+            session.set_value("selectbox", "Choose a Page", "Static Quiz")
+            await self._step(session, "static_quiz")
+            await self._answer(session, "static_answer", "Select an answer:")
+            session.set_value("selectbox", "Choose a Page", "LLM Quiz")
+            await self._step(session, "llm_quiz")
+            await self._answer(session, "llm_answer", "Select an answer:")
+
+    async def walk_app(self):
+        async with BrowserSession("app.py", self.urls["app.py"], self.timeout) as session:
+            await self._step(session, "app_home")
+            session.set_value("text_input", "Learner name", self.learner)
+            await self._step(session, "app_login")
+            await self._click(session, "mock_start", "Start Mock Test")
+            await self._answer(session, "mock_answer", "Select your answer:")
+
+    async def run(self):
+        for walk in (self.walk_main, self.walk_app):
+            try:
+                await walk()
+            except Exception as e:
+                # A failed step ends that app's walk; the other app is still exercised
+                self.errors.append(str(e) if isinstance(e, StepFailed) else f"{walk.__name__}: {e!r}")
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def _summary(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3)
+    }
+
+async def _run_learners(learners):
+    await asyncio.gather(*(learner.run() for learner in learners))
+
+def run_level(sessions, servers, think_time, timeout):
+    """
+    Run `sessions` simulated learners at once; returns rerun latency, throughput, errors and server RSS/CPU.
+    """
+    urls = {script: server.url for script, server in servers.items()}
+    learners = [SimulatedLearner(i, urls, think_time, timeout) for i in range(sessions)]
+    before = {script: server.stats() for script, server in servers.items()}
+    started = time.perf_counter()
+    asyncio.run(_run_learners(learners))
+    wall = time.perf_counter() - started
+
+    timings = [ms for learner in learners for _, ms in learner.timings]
+    by_step = {}
+    for learner in learners:
+        for name, ms in learner.timings:
+            by_step.setdefault(name, []).append(ms)
+    errors = [error for learner in learners for error in learner.errors]
+    level = {
+        "sessions": sessions,
+        "reruns": len(timings),
+        "wall_seconds": round(wall, 3),
+        "reruns_per_second": round(len(timings) / wall, 2) if wall else None,
+        **_summary(timings),
+        "step_p95_ms": {name: _summary(values)["p95_ms"] for name, values in by_step.items()},
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "servers": {}
+    }
+    for script, server in servers.items():
+        after = server.stats()
+        cpu = None
+        if after["cpu_seconds"] is not None and before[script]["cpu_seconds"] is not None:
+            cpu = round(after["cpu_seconds"] - before[script]["cpu_seconds"], 2)
+        level["servers"][script] = {"rss_mb": after["rss_mb"], "cpu_seconds": cpu}
+    return level
+
+def profile_cpu(rounds, servers, timeout):
+    """
+    Walk `rounds` learners one at a time, after an uncounted warm-up walk (imports, caches), and
+    charge each step the CPU its server used meanwhile; returns the mean server CPU milliseconds
+    per interaction, by step. /proc counts CPU in clock ticks (usually 10 ms), so only the mean
+    over several rounds is meaningful.
+    """
+    urls = {script: server.url for script, server in servers.items()}
+    probes = {script: server.cpu_seconds for script, server in servers.items()}
+    by_step = {}
+    errors = []
+    for index in range(rounds + 1):
+        learner = SimulatedLearner(f"cpu-{index}", urls, timeout=timeout, cpu_probes=probes)
+        asyncio.run(learner.run())
+        if index == 0:
+            continue
+        errors.extend(learner.errors)
+        for name, ms in learner.cpu:
+            by_step.setdefault(name, []).append(ms)
+    return {
+        "rounds": rounds,
+        "cpu_ms_per_step": {name: round(sum(values) / len(values), 1) for name, values in by_step.items()},
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent simulated learners through main.py and app.py servers over their websockets, "
+                    "against a stub LLM; prints JSON results."
+    )
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="concurrency levels to run, in order")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM round trip in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="delay between streamed chunks in seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause before each interaction in seconds")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--cpu-rounds", type=int, default=10, help="sequential walks for the per-interaction server CPU profile (0 to skip)")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    workdir = tempfile.mkdtemp(prefix="exam_buddy_load_")
+    llm = StubLLMServer(args.latency, args.chunk_delay)
+    servers = {}
+    try:
+        for script in APPS:
+            servers[script] = AppServer(script, workdir, llm.url)
+        for server in servers.values():
+            server.wait_ready()
+        results = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            "idle_servers": {script: server.stats() for script, server in servers.items()},
+            "levels": []
+        }
+        if args.cpu_rounds:
+            logger.info(f"Profiling server CPU per interaction over {args.cpu_rounds} sequential walks...")
+            results["cpu_profile"] = profile_cpu(args.cpu_rounds, servers, args.timeout)
+        for sessions in args.sessions:
+            logger.info(f"Running {sessions} concurrent sessions...")
+            level = run_level(sessions, servers, args.think_time, args.timeout)
+            logger.info(
+                f"{sessions} sessions: p50 {level.get('p50_ms')} ms, p99 {level.get('p99_ms')} ms, "
+                f"{level['reruns_per_second']} reruns/s, {level['errors']} errors"
+            )
+            results["levels"].append(level)
+    finally:
+        for server in servers.values():
+            server.close()
+        llm.close()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
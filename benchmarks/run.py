@@ -0,0 +1,198 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Benchmarks never touch the real data directory or the on-disk LLM cache;
+# both are read when the app modules are first imported, so set them up front
+os.environ.setdefault("EXAM_BUDDY_DATA_DIR", tempfile.mkdtemp(prefix="exam_buddy_bench_"))
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+
+from benchmarks.stub_client import install_stub_clients, load_fixture
+
+logger = logging.getLogger("benchmarks")
+
+def measure(fn, repeat, warmup=1):
+    """
+    Time `fn` `repeat` times after `warmup` untimed calls; returns summary statistics in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3)
+    }
+
+def _quiz_questions():
+    from llm_parsing import extract_response_text, parse_questions
+    return parse_questions(extract_response_text(load_fixture("llm_quiz_response.json")))
+
+def _schedule_workbook(rows):
+    import pandas as pd
+    from io import BytesIO
+
+    days = pd.date_range("2025-01-01", periods=rows, freq="D")
+    df = pd.DataFrame({
+        "Date": days,
+        "Day": days.strftime("%a"),
+        "Study Hours": [f"{3 + i % 4}:0:{i % 60:02d}:00-1:00:00" for i in range(rows)],
+        "Video Segment": [f"Segment {i % 40}" for i in range(rows)],
+        "Topics": [("EXAM DAY" if i % 30 == 29 else f"Topic {i % 25}, Services {i % 7}") for i in range(rows)],
+        "Hands-On/Labs": [f"Lab {i % 12}" for i in range(rows)],
+        "Tips & Tricks": ["Review notes; practice questions."] * rows,
+        "Status": [""] * rows
+    })
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+def bench_generate_llm_questions(args):
+    from llm_utils import generate_llm_questions
+    return generate_llm_questions
+
+def bench_parse_large_response(args):
+    from llm_parsing import parse_questions
+    questions = _quiz_questions()
+    text = "```json\n" + json.dumps((questions * (args.parse_items // len(questions) + 1))[:args.parse_items], indent=2) + "\n```"
+    return lambda: parse_questions(text)
+
+def bench_parse_repaired_response(args):
+    from llm_parsing import parse_questions
+    questions = _quiz_questions()
+    text = json.dumps((questions * (args.parse_items // len(questions) + 1))[:args.parse_items], indent=2)
+    # Trailing commas force the repair path
+    text = text.replace('"\n  }', '",\n  }')
+    return lambda: parse_questions(text)
+
+def bench_preprocess_notes(args):
+    from notes_snapshot import preprocess_text
+    paragraph = "## Amazon S3\n* **Storage classes** - Standard, Intelligent-Tiering, Glacier_Deep_Archive.\n\n"
+    text = paragraph * (args.notes_kb * 1024 // len(paragraph))
+    return lambda: preprocess_text(text)
+
+def bench_read_excel_openpyxl(args):
+    import pandas as pd
+    from io import BytesIO
+    data = _schedule_workbook(args.schedule_rows)
+    return lambda: pd.read_excel(BytesIO(data), engine="openpyxl")
+
+def bench_read_schedule_excel(args):
+    from schedule_optimizer import read_schedule_excel
+    data = _schedule_workbook(args.schedule_rows)
+    return lambda: read_schedule_excel(data)
+
+def bench_optimize_schedule(args):
+    from schedule_optimizer import optimize_schedule, read_schedule_excel
+    df = read_schedule_excel(_schedule_workbook(args.schedule_rows))
+    return lambda: optimize_schedule(df)
+
+def _app_test(script, page=None):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=120)
+    at.run()
+    if page is not None:
+        at.sidebar.selectbox[0].select(page).run()
+    return at
+
+def bench_main_rerun(args):
+    at = _app_test("main.py")
+    return at.run
+
+def bench_main_flashcards_rerun(args):
+    at = _app_test("main.py", "Flashcards")
+    return at.run
+
+def bench_app_rerun(args):
+    at = _app_test("app.py")
+    return at.run
+
+BENCHMARKS = {
+    "generate_llm_questions": bench_generate_llm_questions,
+    "parse_large_response": bench_parse_large_response,
+    "parse_repaired_response": bench_parse_repaired_response,
+    "preprocess_notes": bench_preprocess_notes,
+    "read_excel_openpyxl": bench_read_excel_openpyxl,
+    "read_schedule_excel": bench_read_schedule_excel,
+    "optimize_schedule": bench_optimize_schedule,
+    "main_rerun": bench_main_rerun,
+    "main_flashcards_rerun": bench_main_flashcards_rerun,
+    "app_rerun": bench_app_rerun,
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline):
+    """
+    Median ratio of each benchmark against a baseline results file (above 1.0 is slower).
+    """
+    ratios = {}
+    for name, stats in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before and before.get("median_ms"):
+            ratios[name] = round(stats["median_ms"] / before["median_ms"], 3)
+    return ratios
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths against a stub LLM and print JSON results.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM round trip in seconds")
+    parser.add_argument("--parse-items", type=int, default=1000, help="questions in the large parse benchmarks")
+    parser.add_argument("--notes-kb", type=int, default=2048, help="size of the notes text in KiB")
+    parser.add_argument("--schedule-rows", type=int, default=5000)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare medians against")
+    args = parser.parse_args(argv)
+    # Keep app logging quiet; progress goes to stderr so stdout stays valid JSON
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    install_stub_clients(latency=args.latency)
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("only", "output", "compare")},
+        "results": {}
+    }
+    for name in args.only or BENCHMARKS:
+        logger.info(f"Running {name}...")
+        results["results"][name] = measure(BENCHMARKS[name](args), args.repeat)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            results["compare"] = compare(results, json.load(f))
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_QUESTION_RE = re.compile(r'"question":\s*"')
+# Words for the made-up scenarios that make varied replays distinct questions
+_SCENARIO_WORDS = (
+    "retailer hospital school bank studio airline farm museum startup insurer library clinic "
+    "factory newsroom charity stadium hotel garage bakery laboratory archive marina observatory "
+    "migrates expands launches audits modernizes consolidates streams archives secures scales "
+    "nightly regional seasonal global legacy mobile analytics payroll inventory telemetry"
+).split()
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def load_stub_notes_index():
+    """
+    NotesIndex over a fixed notes snapshot, so stub runs never fetch the GitHub notes.
+    """
+    from notes_index import NotesIndex
+    with open(os.path.join(FIXTURES_DIR, "notes.txt"), encoding="utf-8") as f:
+        return NotesIndex.build(f.read(), "stub")
+
+class StubEuriaiClient:
+    """
+    Stand-in for EuriaiClient that replays recorded chat-completions payloads in turn.
+
+    Each call sleeps for `latency` seconds before answering, like a provider round trip.
+    Streams replay the same text as server-sent events of `chunk_chars` characters,
+    `chunk_delay` seconds apart. With vary=True every question text gets a different made-up
+    scenario prepended, so repeated calls do not come back as near-duplicates.
+    """
+
+    def __init__(self, responses, model="stub", latency=0.0, chunk_chars=40, chunk_delay=0.0, vary=False):
+        self.model = model
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.vary = vary
+        self._responses = itertools.cycle(responses)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _next_response(self):
+        with self._lock:
+            self.calls += 1
+            response = next(self._responses)
+            call = self.calls
+        if self.vary:
+            response = self._varied(response, random.Random(call))
+        return response
+
+    @staticmethod
+    def _varied(response, rng):
+        choice = response["choices"][0]
+        text = _QUESTION_RE.sub(
+            lambda match: match.group(0) + " ".join(rng.choices(_SCENARIO_WORDS, k=24)).capitalize() + ". ",
+            choice["message"]["content"]
+        )
+        return dict(response, choices=[dict(choice, message=dict(choice["message"], content=text))])
+
+    def generate_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        response = self._next_response()
+        time.sleep(self.latency)
+        return response
+
+    def stream_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        text = self._next_response()["choices"][0]["message"]["content"]
+        time.sleep(self.latency)
+        for start in range(0, len(text), self.chunk_chars):
+            delta = {"choices": [{"index": 0, "delta": {"content": text[start:start + self.chunk_chars]}}]}
+            yield f"data: {json.dumps(delta)}"
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+        yield "data: [DONE]"
+
+def install_stub_clients(latency=0.0, chunk_delay=0.0, vary=False):
+    """
+    Make the LLM Quiz and Mock Test models resolve to stubs wrapped in the real ResilientLLMClient.
+    The rate limit is lifted and the response cache is left out so every call reaches the stub.
+    Returns {model: stub}.
+    """
+    from llm_client import ResilientLLMClient, TokenBucket, set_llm_client
+    from llm_utils import QUIZ_MODEL
+    from mock_test import MOCK_TEST_MODEL
+
+    stubs = {
+        QUIZ_MODEL: StubEuriaiClient([load_fixture("llm_quiz_response.json")], QUIZ_MODEL, latency, chunk_delay=chunk_delay, vary=vary),
+        MOCK_TEST_MODEL: StubEuriaiClient([load_fixture("mock_test_response.json")], MOCK_TEST_MODEL, latency, chunk_delay=chunk_delay, vary=vary),
+    }
+    for model, stub in stubs.items():
+        set_llm_client(model, ResilientLLMClient(stub, rate_limiter=TokenBucket(rate=1e6, capacity=1e6)))
+    return stubs
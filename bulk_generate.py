@@ -0,0 +1,251 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import question_bank
+from config import data_path
+from dedup import QuestionDeduplicator
+from llm_client import get_llm_client
+from llm_parsing import extract_response_text, parse_questions
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("quiz", "mock")
+QUESTIONS_PER_BATCH = 5
+# Completion budget per requested question; the apps use 200-350
+TOKENS_PER_QUESTION = 350
+CHECKPOINT_FORMAT = 1
+REPORT_INTERVAL = 10.0
+
+def _batch_plan(kind, count, notes_index=None):
+    """
+    Return (model, answer key, question bank source, topics, build_prompt) for a kind of question.
+    Batches take the topics in turn, so consecutive batches cover different ones.
+    Mock prompts use `notes_index` if given, otherwise the app's GitHub notes.
+    """
+    if kind == "quiz":
+        from llm_utils import QUESTION_SHARDS, QUIZ_MODEL, build_shard_prompt
+        return QUIZ_MODEL, "answer", question_bank.SOURCE_CAF_WAF, QUESTION_SHARDS, \
+            lambda focus: build_shard_prompt(focus, count)
+    from mock_test import MOCK_TEST_MODEL, MOCK_TEST_TOPICS, build_mock_prompt
+    return MOCK_TEST_MODEL, "correct_answer", question_bank.SOURCE_MOCK_TEST, MOCK_TEST_TOPICS, \
+        lambda topic: build_mock_prompt(count, [topic], notes_index)
+
+def _request_batch(client, prompt, max_tokens, answer_key):
+    response = client.generate_completion(
+        prompt=prompt,
+        temperature=0.7,
+        max_tokens=max_tokens,
+        use_cache=False
+    )
+    return parse_questions(extract_response_text(response), answer_key=answer_key)
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Unsupported checkpoint format in {path}")
+    return state
+
+def _write_checkpoint(state, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _open_output(path, state):
+    """
+    Open the output for appending after the last checkpointed batch and return (file, deduplicator).
+    Lines past the checkpoint (a batch cut short by a crash) are truncated, and the questions
+    already written are loaded so resumed batches do not repeat them.
+    """
+    seen = QuestionDeduplicator()
+    f = open(path, "r+b" if state["size"] else "w+b")
+    f.truncate(state["size"])
+    f.seek(0)
+    for key, line in enumerate(f):
+        seen.add(key, json.loads(line))
+    f.seek(0, os.SEEK_END)
+    return f, seen
+
+def generate(kind, target, output, workers=4, per_batch=QUESTIONS_PER_BATCH, resume=False,
+             store_in_bank=False, max_batches=None, max_failures=10, notes_index=None):
+    """
+    Generate `target` unique questions of `kind` ("quiz" or "mock") with the apps' prompts,
+    running up to `workers` batches concurrently and appending each batch to the JSON Lines
+    file `output` as it completes. Progress is checkpointed after every batch, so an interrupted
+    run continues where it stopped with resume=True. Mock prompts are built from `notes_index`
+    when given, instead of fetching the notes. Returns a summary of the run.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown question kind: {kind}")
+    checkpoint_path = f"{output}.checkpoint.json"
+    state = read_checkpoint(checkpoint_path)
+    if state is not None and not resume:
+        raise FileExistsError(f"{checkpoint_path} exists; resume that run (--resume) or delete the checkpoint")
+    if state is not None and state["kind"] != kind:
+        raise ValueError(f"{checkpoint_path} belongs to a {state['kind']} run")
+    if state is None:
+        state = {
+            "format": CHECKPOINT_FORMAT, "kind": kind, "questions": 0, "size": 0,
+            "next_batch": 0, "completed": [], "failed_batches": 0, "elapsed_seconds": 0.0
+        }
+    if max_batches is None:
+        # Leave room for duplicates and failed batches
+        max_batches = max(-(-target // per_batch) * 3, state["next_batch"] + 1)
+
+    model, answer_key, source, topics, build_prompt = _batch_plan(kind, per_batch, notes_index)
+    # Fails with KeyError before any prompt is built when no API key is configured
+    client = get_llm_client(model)
+    prompts = [build_prompt(topic) for topic in topics]
+    completed = set(state["completed"])
+    # Batches that were in flight when the previous run stopped come first
+    retry = [batch for batch in range(state["next_batch"]) if batch not in completed]
+    started = time.perf_counter()
+    run_questions = 0
+    run_batches = 0
+    consecutive_failures = 0
+    checkpointed_at = reported_at = started
+
+    def next_batch():
+        if retry:
+            return retry.pop(0)
+        if state["next_batch"] >= max_batches:
+            return None
+        state["next_batch"] += 1
+        return state["next_batch"] - 1
+
+    f, seen = _open_output(output, state)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-generate")
+    in_flight = {}
+    try:
+        while True:
+            while (len(in_flight) < workers and state["questions"] < target
+                   and consecutive_failures < max_failures):
+                batch = next_batch()
+                if batch is None:
+                    break
+                future = executor.submit(
+                    _request_batch, client, prompts[batch % len(prompts)], TOKENS_PER_QUESTION * per_batch, answer_key
+                )
+                in_flight[future] = batch
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                try:
+                    questions = future.result()
+                except Exception as e:
+                    # Left out of `completed`, so a resumed run retries it
+                    consecutive_failures += 1
+                    state["failed_batches"] += 1
+                    logger.error(f"Batch {batch} failed: {str(e)}")
+                    continue
+                consecutive_failures = 0
+                fresh = []
+                for question in questions:
+                    if state["questions"] + len(fresh) >= target:
+                        break
+                    if answer_key != "answer":
+                        question = dict(question, answer=question[answer_key])
+                        del question[answer_key]
+                    if seen.check_and_add(state["questions"] + len(fresh), question):
+                        fresh.append(question)
+                lines = "".join(json.dumps(dict(question, kind=kind, batch=batch)) + "\n" for question in fresh)
+                f.write(lines.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                if store_in_bank and fresh:
+                    question_bank.add_questions(fresh, source)
+                run_questions += len(fresh)
+                run_batches += 1
+                completed.add(batch)
+                now = time.perf_counter()
+                state.update(
+                    questions=state["questions"] + len(fresh),
+                    size=f.tell(),
+                    completed=sorted(completed),
+                    elapsed_seconds=round(state["elapsed_seconds"] + now - checkpointed_at, 3)
+                )
+                checkpointed_at = now
+                _write_checkpoint(state, checkpoint_path)
+            if time.perf_counter() - reported_at >= REPORT_INTERVAL:
+                reported_at = time.perf_counter()
+                logger.info(
+                    f"{state['questions']}/{target} questions after {run_batches} batches, "
+                    f"{run_questions / (reported_at - started) * 60:.1f} questions/min"
+                )
+        if consecutive_failures >= max_failures:
+            logger.error(f"Stopped after {consecutive_failures} consecutive failed batches; rerun with --resume to continue.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        f.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "output": output,
+        "questions": state["questions"],
+        "target": target,
+        "complete": state["questions"] >= target,
+        "run_questions": run_questions,
+        "run_batches": run_batches,
+        "failed_batches": state["failed_batches"],
+        "elapsed_seconds": round(elapsed, 3),
+        "questions_per_minute": round(run_questions / elapsed * 60, 1) if elapsed else 0.0
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate quiz or mock test questions in bulk with the apps' prompts, writing JSON Lines as it goes."
+    )
+    parser.add_argument("kind", choices=KINDS, help="quiz: LLM Quiz (CAF/WAF) questions; mock: scenario-based mock test questions")
+    parser.add_argument("--target", type=int, default=1000, help="unique questions to generate")
+    parser.add_argument("--output", help="JSON Lines output file (default: <data dir>/bulk_<kind>.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent LLM requests")
+    parser.add_argument("--per-batch", type=int, default=QUESTIONS_PER_BATCH, help="questions asked for per request")
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches (default: three times the minimum)")
+    parser.add_argument("--max-failures", type=int, default=10, help="stop after this many consecutive failed batches")
+    parser.add_argument("--resume", action="store_true", help="continue the run recorded in the output's checkpoint")
+    parser.add_argument("--bank", action="store_true", help="also store the questions in the apps' question bank")
+    parser.add_argument("--stub", action="store_true", help="use the replaying stub LLM client from benchmarks/")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="stub LLM round trip in seconds")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    notes_index = None
+    if args.stub:
+        from benchmarks.stub_client import install_stub_clients, load_stub_notes_index
+        install_stub_clients(latency=args.stub_latency, vary=True)
+        notes_index = load_stub_notes_index()
+    output = args.output or data_path(f"bulk_{args.kind}.jsonl")
+    try:
+        summary = generate(
+            args.kind, args.target, output,
+            workers=args.workers,
+            per_batch=args.per_batch,
+            resume=args.resume,
+            store_in_bank=args.bank,
+            max_batches=args.max_batches,
+            max_failures=args.max_failures,
+            notes_index=notes_index
+        )
+    except (FileExistsError, ValueError) as e:
+        parser.error(str(e))
+    except KeyError:
+        parser.error("EURIAI_API_KEY is not configured; add it to .streamlit/secrets.toml or pass --stub")
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["complete"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import os
+
+# Directory for local state (question bank, caches, snapshots). Override with EXAM_BUDDY_DATA_DIR.
+DATA_DIR = os.environ.get(
+    "EXAM_BUDDY_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".exam_buddy")
+)
+
+def data_path(*parts):
+    """
+    Return a path inside DATA_DIR, creating the parent directory if needed.
+    """
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Packs are JSON Lines files named <name>.<kind>.jsonl, e.g. clf_caf_waf.questions.jsonl.
+# Every line is one item with "id", "exam", "domain" and "topic" fields plus the item itself:
+# "front"/"back" for flashcards, "question"/"options"/"answer"/"explanation" for questions.
+CONTENT_DIR = os.environ.get("CONTENT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+INDEX_FILE = "index.json"
+INDEX_FORMAT = 2
+KINDS = ("flashcards", "questions")
+FACETS = ("exam", "domain", "topic")
+
+def index_pack(path):
+    """
+    Scan one pack and return its index entry: line byte offsets and item ids, plus item positions
+    per exam, domain and topic.
+    """
+    file_name = os.path.basename(path)
+    name, kind = file_name[:-len(".jsonl")].rsplit(".", 1)
+    entry = {"name": name, "kind": kind, "file": file_name, "size": os.path.getsize(path), "offsets": [], "ids": []}
+    entry.update({facet: {} for facet in FACETS})
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                position = len(entry["offsets"])
+                entry["offsets"].append(offset)
+                entry["ids"].append(item.get("id") or f"{name}:{position}")
+                for facet in FACETS:
+                    entry[facet].setdefault(item.get(facet) or "", []).append(position)
+            offset += len(line)
+    return entry
+
+def _pack_paths(content_dir):
+    return sorted(
+        os.path.join(content_dir, file_name) for file_name in os.listdir(content_dir)
+        if file_name.endswith(".jsonl") and file_name[:-len(".jsonl")].rsplit(".", 1)[-1] in KINDS
+    )
+
+def build_index(content_dir=CONTENT_DIR):
+    """
+    Rebuild the index file of a content directory. Run after adding or editing packs.
+    """
+    index = {"format": INDEX_FORMAT, "packs": [index_pack(path) for path in _pack_paths(content_dir)]}
+    tmp_path = os.path.join(content_dir, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, os.path.join(content_dir, INDEX_FILE))
+    return index
+
+class ContentPack:
+    """
+    One indexed pack. Items are read by byte offset on first use and kept in memory afterwards,
+    so opening the library costs nothing for packs that are never sampled.
+    """
+
+    def __init__(self, content_dir, entry):
+        self.path = os.path.join(content_dir, entry["file"])
+        self.name = entry["name"]
+        self.kind = entry["kind"]
+        self.offsets = entry["offsets"]
+        self.ids = entry["ids"]
+        self.facets = {facet: entry[facet] for facet in FACETS}
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def select(self, **filters):
+        """
+        Positions of the items matching every given facet value, from the index alone.
+        """
+        selected = None
+        for facet, value in filters.items():
+            if value is None:
+                continue
+            positions = set(self.facets[facet].get(value, ()))
+            selected = positions if selected is None else selected & positions
+        return sorted(selected) if selected is not None else list(range(len(self.offsets)))
+
+    def read(self, positions):
+        with self._lock:
+            missing = sorted(position for position in positions if position not in self._items)
+            if missing:
+                with open(self.path, "rb") as f:
+                    for position in missing:
+                        f.seek(self.offsets[position])
+                        self._items[position] = json.loads(f.readline())
+            return [self._items[position] for position in positions]
+
+class ContentLibrary:
+    """
+    All content packs of a directory, opened from the prebuilt index.
+    A pack whose file no longer matches the index, or is missing from it, is re-indexed in memory.
+    """
+
+    def __init__(self, content_dir=CONTENT_DIR):
+        self.content_dir = content_dir
+        self._positions = {}
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(content_dir, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+            entries = {entry["file"]: entry for entry in index["packs"]} if index.get("format") == INDEX_FORMAT else {}
+            if not entries:
+                logger.warning(f"Content index format {index.get('format')} is outdated; indexing packs in memory.")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Content index unreadable, indexing packs in memory: {str(e)}")
+            entries = {}
+        self.packs = []
+        for path in _pack_paths(content_dir):
+            entry = entries.get(os.path.basename(path))
+            if entry is None or entry["size"] != os.path.getsize(path):
+                logger.warning(f"Content index is stale for {path}; run `python content_packs.py` to rebuild it.")
+                entry = index_pack(path)
+            self.packs.append(ContentPack(content_dir, entry))
+
+    def ids(self, kind):
+        """
+        Ids of every item of `kind`, in pack order, without reading any pack.
+        """
+        return [item_id for pack in self.packs if pack.kind == kind for item_id in pack.ids]
+
+    def get(self, kind, item_id):
+        """
+        Read one item by id, or return None if there is no such item.
+        """
+        with self._lock:
+            if kind not in self._positions:
+                self._positions[kind] = {
+                    item_id: (pack, position)
+                    for pack in self.packs if pack.kind == kind
+                    for position, item_id in enumerate(pack.ids)
+                }
+            ref = self._positions[kind].get(item_id)
+        if ref is None:
+            return None
+        pack, position = ref
+        return pack.read([position])[0]
+
+    def facet_values(self, kind, facet):
+        return sorted({value for pack in self.packs if pack.kind == kind for value in pack.facets[facet] if value})
+
+    def count(self, kind, exam=None, domain=None, topic=None):
+        return sum(len(pack.select(exam=exam, domain=domain, topic=topic)) for pack in self.packs if pack.kind == kind)
+
+    def items(self, kind, exam=None, domain=None, topic=None):
+        """
+        Every matching item, in pack order.
+        """
+        return [
+            item
+            for pack in self.packs if pack.kind == kind
+            for item in pack.read(pack.select(exam=exam, domain=domain, topic=topic))
+        ]
+
+    def sample(self, kind, count, exam=None, domain=None, topic=None):
+        """
+        Up to `count` random matching items, e.g. sample("questions", 15, domain="WAF", topic="Reliability").
+        Only the sampled items are read from disk.
+        """
+        refs = [
+            (pack, position)
+            for pack in self.packs if pack.kind == kind
+            for position in pack.select(exam=exam, domain=domain, topic=topic)
+        ]
+        chosen = random.sample(refs, min(count, len(refs)))
+        by_pack = {}
+        for pack, position in chosen:
+            by_pack.setdefault(pack, []).append(position)
+        loaded = {}
+        for pack, positions in by_pack.items():
+            loaded.update(((pack, position), item) for position, item in zip(positions, pack.read(positions)))
+        return [loaded[ref] for ref in chosen]
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    built = build_index()
+    for pack in built["packs"]:
+        logger.info(f"Indexed {pack['file']}: {len(pack['offsets'])} {pack['kind']}.")
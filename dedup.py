@@ -0,0 +1,124 @@
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# MinHash / LSH parameters: 16 bands of 4 rows catch pairs above roughly 0.5 Jaccard similarity
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# A candidate is a near-duplicate above this estimated Jaccard similarity,
+# or above the lower one when both questions offer the same set of options
+DUPLICATE_THRESHOLD = 0.8
+SAME_OPTIONS_THRESHOLD = 0.5
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_rng = np.random.default_rng(20250426)
+_PERM_A = _rng.integers(1, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+def option_set(options):
+    """
+    Normalized, order-independent form of a question's options.
+    """
+    return frozenset(" ".join(_words(str(option))) for option in options)
+
+def shingles(question):
+    """
+    Word 3-gram shingles of the question text plus one shingle per normalized option.
+    """
+    words = _words(question.get("question", ""))
+    result = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+    result.update(f"option:{option}" for option in option_set(question.get("options", [])))
+    return result
+
+def signature(question):
+    """
+    MinHash signature (NUM_PERM uint32 values) of a question dict.
+    """
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(question)),
+        dtype=np.uint64
+    )
+    if not hashes.size:
+        return np.zeros(NUM_PERM, dtype=np.uint32)
+    # (a * x + b) mod p fits in uint64 because a, b and x are all below 2**32
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+class QuestionDeduplicator:
+    """
+    LSH index of MinHash signatures for near-duplicate question detection.
+
+    Each signature is split into BANDS bands; questions that share any band bucket are
+    candidates, and candidates are confirmed by their estimated Jaccard similarity.
+    Lookups touch BANDS buckets regardless of corpus size.
+    """
+
+    def __init__(self):
+        self._buckets = [{} for _ in range(BANDS)]
+        self._signatures = {}
+        self._options = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, sig):
+        return [sig[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+    def _find(self, sig, options):
+        checked = set()
+        for band, band_key in enumerate(self._band_keys(sig)):
+            for key in self._buckets[band].get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                similarity = float(np.mean(self._signatures[key] == sig))
+                if similarity >= DUPLICATE_THRESHOLD:
+                    return key
+                if similarity >= SAME_OPTIONS_THRESHOLD and self._options[key] == options:
+                    return key
+        return None
+
+    def _add(self, key, sig, options):
+        self._signatures[key] = sig
+        self._options[key] = options
+        for band, band_key in enumerate(self._band_keys(sig)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def find_duplicate(self, question, sig=None):
+        """
+        Return the key of a stored near-duplicate of `question`, or None.
+        """
+        if sig is None:
+            sig = signature(question)
+        with self._lock:
+            return self._find(sig, option_set(question.get("options", [])))
+
+    def add(self, key, question, sig=None):
+        if sig is None:
+            sig = signature(question)
+        with self._lock:
+            self._add(key, sig, option_set(question.get("options", [])))
+
+    def check_and_add(self, key, question, sig=None):
+        """
+        Add `question` unless it is a near-duplicate of a stored one. Returns True if it was added.
+        """
+        if sig is None:
+            sig = signature(question)
+        options = option_set(question.get("options", []))
+        with self._lock:
+            if self._find(sig, options) is not None:
+                return False
+            self._add(key, sig, options)
+            return True
@@ -0,0 +1,335 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from euriai import EuriaiClient
+
+import telemetry
+from response_cache import cache_key, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Point at a local stub server for testing, e.g. EURIAI_ENDPOINT=http://127.0.0.1:8000/chat/completions
+ENDPOINT = os.environ.get("EURIAI_ENDPOINT", "https://api.euron.one/api/v1/euri/chat/completions")
+REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "120"))
+RATE_PER_SECOND = float(os.environ.get("LLM_RATE_PER_SECOND", "2"))
+BURST = int(os.environ.get("LLM_BURST", "5"))
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+CIRCUIT_FAILURES = int(os.environ.get("LLM_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling the provider while the circuit breaker is open.
+    """
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` requests per second with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects calls for `reset_timeout`
+    seconds. After that a single trial call is let through; its outcome closes or reopens the circuit.
+    A failed call is one that still hit a transient error after all its retries.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURES, reset_timeout=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            # Half-open: let one trial call through
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """
+        End a half-open trial whose outcome says nothing about the provider's health,
+        e.g. a rejected request; the next call is let through as a new trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"LLM circuit breaker opened after {self._failures} consecutive failures.")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class SessionEuriaiClient(EuriaiClient):
+    """
+    EuriaiClient that sends every request through one pooled requests.Session,
+    so TCP/TLS connections are reused across calls and threads.
+    """
+
+    def __init__(self, api_key, model, endpoint=ENDPOINT, timeout=REQUEST_TIMEOUT, pool_size=MAX_CONCURRENCY):
+        super().__init__(api_key=api_key, model=model, endpoint=endpoint)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        })
+
+    def _payload(self, prompt, temperature, max_tokens, **options):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        payload.update({key: value for key, value in options.items() if value is not None})
+        return payload
+
+    def generate_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        response = self.session.post(
+            self.endpoint,
+            json=self._payload(prompt, temperature, max_tokens, **options),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stream_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        payload = self._payload(prompt, temperature, max_tokens, stream=True, **options)
+        with self.session.post(self.endpoint, json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield line.decode("utf-8")
+
+def _response_text(response):
+    try:
+        return response["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+def _is_transient(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+class ResilientLLMClient:
+    """
+    Process-wide wrapper around an EuriaiClient-compatible client that adds a token-bucket
+    rate limit, bounded concurrency, jittered retries on transient errors and a circuit breaker.
+    While the circuit is open, calls raise CircuitOpenError immediately so callers can fall back.
+    Non-streamed completions are answered from `cache` (a ResponseCache) when possible.
+    """
+
+    def __init__(self, client, rate_limiter=None, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, breaker=None, base_delay=0.5, max_delay=8.0, cache=None):
+        self.client = client
+        self.cache = cache
+        self.model = getattr(client, "model", None)
+        self.rate_limiter = rate_limiter or TokenBucket(RATE_PER_SECOND, BURST)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._slots = threading.BoundedSemaphore(max(max_concurrency, 1))
+
+    @property
+    def healthy(self):
+        return not self.breaker.is_open
+
+    def _backoff(self, attempt, error):
+        # Full jitter: a random delay up to the exponential cap, unless the server says otherwise
+        delay = _retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        time.sleep(delay)
+
+    def _call(self, send):
+        # One logical call is one breaker decision and at most one recorded failure, however many attempts it takes
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM provider is unhealthy; circuit breaker is open.")
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with self._slots:
+                    result = send()
+            except Exception as e:
+                if not _is_transient(e):
+                    # A rejected request (4xx, bad payload) is not a sign of an unhealthy provider
+                    self.breaker.release_trial()
+                    raise
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                logger.warning(f"Transient LLM error (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}")
+                self._backoff(attempt, e)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def generate_completion(self, prompt, temperature=0.7, max_tokens=500, use_cache=True, **options):
+        """
+        Return a completion, from the response cache when an identical request was answered before.
+        Pass use_cache=False when a fresh sample is wanted, e.g. to generate new questions.
+        """
+        with telemetry.span("llm_completion", sample_rate=1.0) as attributes:
+            # Extra sampling options are not part of the cache key, so such requests bypass the cache
+            cache = self.cache if use_cache and not options else None
+            if cache is not None:
+                key = cache_key(self.model, prompt, temperature, max_tokens)
+                cached = cache.get(key)
+                if cached is not None:
+                    attributes.update(telemetry.record_llm_call(self.model, prompt, _response_text(cached), cached=True))
+                    return cached
+            try:
+                response = self._call(lambda: self.client.generate_completion(
+                    prompt=prompt, temperature=temperature, max_tokens=max_tokens, **options
+                ))
+            except Exception as e:
+                outcome = "circuit_open" if isinstance(e, CircuitOpenError) else "error"
+                attributes.update(telemetry.record_llm_call(self.model, prompt, "", outcome=outcome))
+                raise
+            attributes.update(telemetry.record_llm_call(
+                self.model, prompt, _response_text(response),
+                usage=response.get("usage") if isinstance(response, dict) else None
+            ))
+            if cache is not None:
+                cache.set(key, response)
+            return response
+
+    def stream_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        """
+        Stream a completion. Retries only happen before the first chunk is received,
+        so a retried stream never repeats text already yielded. The concurrency slot is only
+        held while the stream is opened, so a slow or abandoned consumer never blocks it;
+        closing the generator closes the provider stream.
+        """
+        def open_stream():
+            chunks = iter(self.client.stream_completion(
+                prompt=prompt, temperature=temperature, max_tokens=max_tokens, **options
+            ))
+            return chunks, next(chunks, None)
+
+        with telemetry.span("llm_stream", sample_rate=1.0, model=self.model) as attributes:
+            started = time.perf_counter()
+            try:
+                chunks, first = self._call(open_stream)
+            except Exception as e:
+                outcome = "circuit_open" if isinstance(e, CircuitOpenError) else "error"
+                attributes.update(telemetry.record_llm_call(self.model, prompt, "", outcome=outcome))
+                raise
+            attributes["first_chunk_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            # Raw stream lines include SSE framing, so this slightly overestimates completion tokens
+            streamed_chars = 0
+            try:
+                if first is not None:
+                    streamed_chars += len(first)
+                    yield first
+                    for chunk in chunks:
+                        streamed_chars += len(chunk)
+                        yield chunk
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+                # Also recorded when the consumer stops early and closes this generator
+                attributes.update(telemetry.record_llm_call(
+                    self.model, prompt, "", usage={"completion_tokens": (streamed_chars + 3) // 4}
+                ))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _resolve_api_key():
+    api_key = os.environ.get("EURIAI_API_KEY")
+    if api_key:
+        return api_key
+    import streamlit as st
+    try:
+        return st.secrets["EURIAI_API_KEY"]
+    except FileNotFoundError:
+        # No secrets.toml at all; report it the same way as a missing key
+        raise KeyError("EURIAI_API_KEY")
+
+def get_llm_client(model):
+    """
+    Return the shared ResilientLLMClient for `model`, creating it on first use.
+    Raises KeyError if no EURIAI_API_KEY is configured.
+    """
+    with _clients_lock:
+        client = _clients.get(model)
+        if client is None:
+            client = ResilientLLMClient(
+                SessionEuriaiClient(api_key=_resolve_api_key(), model=model),
+                cache=get_response_cache()
+            )
+            _clients[model] = client
+        return client
+
+def set_llm_client(model, client):
+    """
+    Install `client` as the shared client for `model`, e.g. a ResilientLLMClient around a stub in benchmarks.
+    """
+    with _clients_lock:
+        _clients[model] = client
@@ -0,0 +1,326 @@
+import json
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import NamedTuple
+
+from jsonschema import Draft7Validator
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+ANSWER_KEYS = ("answer", "correct_answer", "correctAnswer", "correct")
+
+_FENCE_RE = re.compile(r"```[a-zA-Z]*")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+_OPTION_LABEL_RE = re.compile(r"^\s*(?:\(?[A-Da-d][).:]|[1-4][).:])\s+")
+
+@lru_cache(maxsize=None)
+def _question_validator(answer_key):
+    # Compiled once per answer key; the membership check on the answer is done separately
+    return Draft7Validator({
+        "type": "object",
+        "required": ["question", "options", answer_key, "explanation"],
+        "properties": {
+            "question": {"type": "string", "minLength": 1},
+            "options": {"type": "array", "items": {"type": "string"}, "minItems": 4, "maxItems": 4},
+            answer_key: {"type": "string"},
+            "explanation": {"type": "string"}
+        }
+    })
+
+def is_valid_question(question, answer_key="answer"):
+    """
+    Check a question dict against the quiz rules: question, options, answer and explanation
+    keys present, four options, and an answer that is one of the options.
+    """
+    return (
+        _question_validator(answer_key).is_valid(question) and
+        question[answer_key] in question["options"]
+    )
+
+def normalize_question(question, answer_key="answer"):
+    """
+    Map the answer/correct_answer variants onto `answer_key`, unwrap lettered option dicts,
+    resolve answers given as a letter or index, and strip whitespace. Returns a new dict,
+    or `question` unchanged if it is not a dict.
+    """
+    if not isinstance(question, dict):
+        return question
+    normalized = {key: value for key, value in question.items() if key not in ANSWER_KEYS}
+    options = question.get("options")
+    if isinstance(options, dict):
+        options = list(options.values())
+    if isinstance(options, list):
+        options = [option.strip() if isinstance(option, str) else option for option in options]
+    normalized["options"] = options
+    answer = next((question[key] for key in ANSWER_KEYS if key in question), None)
+    if isinstance(answer, str):
+        answer = answer.strip()
+    if isinstance(options, list) and answer not in options:
+        answer = _resolve_answer(answer, options)
+    normalized[answer_key] = answer
+    for key in ("question", "explanation"):
+        if isinstance(normalized.get(key), str):
+            normalized[key] = normalized[key].strip()
+    return normalized
+
+def _resolve_answer(answer, options):
+    # "B", "b)", 1 or "Option text" with an "A) " style label
+    if isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(options):
+        return options[answer]
+    if not isinstance(answer, str):
+        return answer
+    letter = answer.rstrip(").:").strip()
+    if len(letter) == 1 and letter.upper() in "ABCD" and "ABCD".index(letter.upper()) < len(options):
+        return options["ABCD".index(letter.upper())]
+    unlabeled = _OPTION_LABEL_RE.sub("", answer)
+    for option in options:
+        if isinstance(option, str) and _OPTION_LABEL_RE.sub("", option) == unlabeled:
+            return option
+    return answer
+
+def extract_response_text(response):
+    """
+    Return the completion text from an EuriaiClient response, or None if it cannot be found.
+    """
+    # Handle dictionary response
+    if isinstance(response, dict):
+        # Try common field names for the response text
+        possible_fields = ["text", "content", "response", "completion"]
+        response_text = None
+        # Chat-completions payload returned by EuriaiClient.generate_completion
+        choices = response.get("choices")
+        if choices and isinstance(choices[0], dict):
+            response_text = choices[0].get("message", {}).get("content")
+        else:
+            for field in possible_fields:
+                if field in response:
+                    response_text = response[field]
+                    break
+        if response_text is None:
+            logger.error(f"Could not find a valid text field in response: {response.keys()}")
+            return None
+        if not isinstance(response_text, str):
+            logger.error(f"Response text is not a string: {type(response_text)}")
+            return None
+        return response_text
+    elif isinstance(response, str):
+        return response
+    logger.error(f"Unexpected response format: {type(response)}")
+    return None
+
+def stream_text_deltas(chunks):
+    """
+    Turn the lines yielded by EuriaiClient.stream_completion into plain text deltas.
+    Server-sent event lines ("data: {...}") are unwrapped to their chat-completions
+    delta content; anything else is passed through unchanged.
+    """
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8")
+        if not chunk.startswith("data:"):
+            yield chunk
+            continue
+        data = chunk[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content") or (choice.get("message") or {}).get("content")
+            if content:
+                yield content
+
+class JsonArrayStreamParser:
+    """
+    Incrementally parse a JSON array of objects as text arrives.
+
+    feed() returns the objects completed by the new text, so each array element can be
+    used as soon as its closing brace is received. Text before the opening bracket
+    (e.g. a ```json fence) is ignored. An element that fails to parse is repaired if
+    possible (see repair_json) and otherwise skipped without affecting the rest of the array.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.skipped = 0
+        self.repaired = 0
+
+    def feed(self, text):
+        completed = []
+        for char in text:
+            if not self._in_array:
+                if char == "[":
+                    self._in_array = True
+                continue
+            if self._depth == 0:
+                # Between elements: only an opening brace starts a new object
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    element = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        completed.append(json.loads(element))
+                    except json.JSONDecodeError:
+                        repaired = _loads_repaired(element)
+                        if repaired is None:
+                            self.skipped += 1
+                            logger.warning("Skipping malformed object in streamed JSON array.")
+                        else:
+                            self.repaired += 1
+                            completed.append(repaired)
+        return completed
+
+def iter_stream_questions(chunks, answer_key="answer"):
+    """
+    Yield valid questions from a streamed completion as soon as each one is complete.
+    """
+    parser = JsonArrayStreamParser()
+    items = valid = 0
+    try:
+        for text in stream_text_deltas(chunks):
+            for question in parser.feed(text):
+                items += 1
+                question = normalize_question(question, answer_key)
+                if is_valid_question(question, answer_key):
+                    valid += 1
+                    yield question
+    finally:
+        # Also counted when the consumer stops early and closes the generator
+        parse_stats.record(valid, items + parser.skipped, parser.repaired)
+
+def repair_json(text):
+    """
+    Fix the defects LLMs commonly put in JSON: trailing commas and curly quotes used as delimiters.
+    """
+    return _TRAILING_COMMA_RE.sub(r"\1", text.translate(_SMART_QUOTES))
+
+def _loads_repaired(text):
+    for candidate in (_TRAILING_COMMA_RE.sub(r"\1", text), repair_json(text)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+def extract_json_array(text):
+    """
+    Strip code fences and return the outermost JSON array in `text` (possibly unterminated
+    if the output was cut off), or None if there is no opening bracket.
+    """
+    text = _FENCE_RE.sub("", text)
+    start = text.find("[")
+    if start == -1:
+        return None
+    end = text.rfind("]")
+    return text[start:end + 1] if end > start else text[start:]
+
+class ParsedArray(NamedTuple):
+    items: list
+    repaired: bool
+    skipped: int
+
+def parse_json_array(text):
+    """
+    Parse the JSON array in an LLM completion in one pass, falling back to repairing the
+    whole array and then to salvaging the objects that parse on their own.
+    `repaired` is True if the strict parse failed; `skipped` counts objects that were lost.
+    """
+    array_text = extract_json_array(text or "")
+    if array_text is None:
+        return ParsedArray([], False, 0)
+    try:
+        items = json.loads(array_text)
+        if isinstance(items, list):
+            return ParsedArray(items, False, 0)
+    except json.JSONDecodeError:
+        pass
+    items = _loads_repaired(array_text)
+    if isinstance(items, list):
+        return ParsedArray(items, True, 0)
+    parser = JsonArrayStreamParser()
+    items = parser.feed(array_text)
+    return ParsedArray(items, True, parser.skipped)
+
+def parse_questions(text, answer_key="answer"):
+    """
+    Return the valid, normalized questions in an LLM completion, salvaging what it can
+    from broken output. Every call is counted in parse_stats.
+    """
+    parsed = parse_json_array(text)
+    questions = [normalize_question(item, answer_key) for item in parsed.items]
+    valid = [question for question in questions if is_valid_question(question, answer_key)]
+    total = len(parsed.items) + parsed.skipped
+    parse_stats.record(len(valid), total, parsed.repaired)
+    if len(valid) < total:
+        logger.warning(f"Dropped {total - len(valid)} of {total} generated questions that failed to parse or validate.")
+    return valid
+
+class ParseStats:
+    """
+    Process-wide counters for question generations: parsed cleanly, salvaged (some valid
+    questions recovered by repair or despite dropped items) and lost (no valid questions).
+    """
+
+    def __init__(self):
+        self.clean = 0
+        self.salvaged = 0
+        self.lost = 0
+        self.dropped_items = 0
+        self._lock = threading.Lock()
+
+    def record(self, valid, items, repaired):
+        with self._lock:
+            self.dropped_items += max(items - valid, 0)
+            if not valid:
+                self.lost += 1
+                outcome = "lost"
+            elif repaired or valid < items:
+                self.salvaged += 1
+                outcome = "salvaged"
+            else:
+                self.clean += 1
+                outcome = "clean"
+            stats = self.snapshot()
+        telemetry.increment("llm_parse_total", outcome=outcome)
+        if items > valid:
+            telemetry.increment("llm_parse_dropped_items_total", items - valid)
+        if repaired or valid < items or not valid:
+            logger.info(f"LLM question parsing: {stats}")
+
+    def snapshot(self):
+        return {
+            "clean": self.clean,
+            "salvaged": self.salvaged,
+            "lost": self.lost,
+            "dropped_items": self.dropped_items
+        }
+
+parse_stats = ParseStats()
@@ -1,34 +1,22 @@
-import json
 import streamlit as st
 import logging
-from euriai import EuriaiClient
+import question_bank
+from llm_client import get_llm_client
+from llm_parsing import extract_response_text, iter_stream_questions, parse_questions
+from question_pool import QuestionPoolWorker
+from question_stream import QuestionStream
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_llm_questions():
-    """
-    Generate 15–20 quiz questions using the EuriaiClient SDK with gpt-4.1-nano.
-    Returns a list of question dictionaries with question, options, answer, and explanation.
-    """
-    # Load API key from Streamlit secrets
-    try:
-        api_key = st.secrets["EURIAI_API_KEY"]
-    except KeyError:
-        logger.error("EURIAI_API_KEY not found in Streamlit secrets.")
-        return []
+QUIZ_MODEL = "gpt-4.1-nano"
+# Questions per LLM Quiz, whether drawn from the bank or streamed
+LLM_QUIZ_LENGTH = 15
 
-    # Initialize EuriaiClient
-    try:
-        client = EuriaiClient(api_key=api_key, model="gpt-4.1-nano")
-    except Exception as e:
-        logger.error(f"Failed to initialize EuriaiClient: {str(e)}")
-        return []
-
-    # LLM Prompt
-    prompt = """
-    You are an expert in AWS and the AWS Certified Cloud Practitioner exam. Generate 15–20 multiple-choice questions (10 knowledge-based, 5–10 scenario-based) about the AWS Cloud Adoption Framework (CAF) and AWS Well-Architected Framework (WAF). Ensure variability in wording, scenarios (e.g., healthcare, gaming, education industries), and difficulty, but keep questions high-level, suitable for the Cloud Practitioner exam. Use the following context to align with the exam's focus:
+# Shared LLM Quiz prompt; {request} says how many questions to write and on which topics
+QUIZ_PROMPT_TEMPLATE = """
+    You are an expert in AWS and the AWS Certified Cloud Practitioner exam. {request} Ensure variability in wording, scenarios (e.g., healthcare, gaming, education industries), and difficulty, but keep questions high-level, suitable for the Cloud Practitioner exam. Use the following context to align with the exam's focus:
 
     **AWS CAF**:
     - Metaphor: City planning for cloud adoption.
@@ -67,53 +55,126 @@ def generate_llm_questions():
     Avoid duplicating questions or using overly similar wording. Ensure scenarios cover diverse industries and use cases.
     """
 
+FULL_QUIZ_REQUEST = "Generate 15–20 multiple-choice questions (10 knowledge-based, 5–10 scenario-based) about the AWS Cloud Adoption Framework (CAF) and AWS Well-Architected Framework (WAF)."
+
+# Shards: each prompt covers one slice of CAF/WAF; bulk_generate.py takes them in turn
+QUESTION_SHARDS = [
+    "the AWS Cloud Adoption Framework (CAF) Business and People perspectives",
+    "the AWS Cloud Adoption Framework (CAF) Governance and Platform perspectives",
+    "the AWS Cloud Adoption Framework (CAF) Security and Operations perspectives",
+    "the four AWS Cloud Adoption Framework (CAF) phases (Envision, Align, Launch, Scale) and the ShopEasy case study",
+    "the AWS Well-Architected Framework (WAF) Operational Excellence and Security pillars",
+    "the AWS Well-Architected Framework (WAF) Reliability and Performance Efficiency pillars",
+    "the AWS Well-Architected Framework (WAF) Cost Optimization and Sustainability pillars",
+    "the Well-Architected Tool, the PayFast case study, and how CAF differs from WAF",
+]
+QUESTIONS_PER_SHARD = 3
+
+def build_quiz_prompt(request=FULL_QUIZ_REQUEST):
+    return QUIZ_PROMPT_TEMPLATE.replace("{request}", request)
+
+def build_shard_prompt(focus, count=QUESTIONS_PER_SHARD):
+    return build_quiz_prompt(
+        f"Generate {count} multiple-choice questions (mix knowledge-based and scenario-based) about {focus}."
+    )
+
+def _create_client():
+    """
+    Return the shared gpt-4.1-nano client (rate limited, retried, circuit-broken). Returns None on failure.
+    """
+    try:
+        return get_llm_client(QUIZ_MODEL)
+    except KeyError:
+        logger.error("EURIAI_API_KEY not found in Streamlit secrets.")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to initialize EuriaiClient: {str(e)}")
+        return None
+
+def _request_questions(client, prompt, max_tokens, use_cache=False):
+    """
+    Run one completion, store its valid questions in the question bank and return those
+    that were not near-duplicates of questions already in the bank.
+    """
+    response = client.generate_completion(
+        prompt=prompt,
+        temperature=0.7,
+        max_tokens=max_tokens,
+        use_cache=use_cache
+    )
+    valid_questions = parse_questions(extract_response_text(response))
+    return question_bank.add_new_questions(valid_questions, question_bank.SOURCE_CAF_WAF)
+
+def generate_llm_questions(target=20, use_cache=False):
+    """
+    Generate 15–20 quiz questions using the EuriaiClient SDK with gpt-4.1-nano.
+    Returns a list of question dictionaries with question, options, answer, and explanation.
+    The prompt is fixed, so the response cache is bypassed unless use_cache=True: every call
+    asks the LLM for a fresh set of questions.
+    """
+    client = _create_client()
+    if client is None:
+        return []
+
     try:
-        response = client.generate_completion(
-            prompt=prompt,
-            temperature=0.7,
-            max_tokens=4000
-        )
-        # Log response for debugging
-        logger.info(f"Raw LLM response type: {type(response)}, content: {response}")
-
-        # Handle dictionary response
-        if isinstance(response, dict):
-            # Try common field names for the response text
-            possible_fields = ["text", "content", "response", "completion"]
-            response_text = None
-            for field in possible_fields:
-                if field in response:
-                    response_text = response[field]
-                    break
-            if response_text is None:
-                logger.error(f"Could not find a valid text field in response: {response.keys()}")
-                return []
-            if not isinstance(response_text, str):
-                logger.error(f"Response text is not a string: {type(response_text)}")
-                return []
-        elif isinstance(response, str):
-            response_text = response
-        else:
-            logger.error(f"Unexpected response format: {type(response)}")
-            return []
-
-        # Parse JSON from response_text
-        try:
-            questions = json.loads(response_text)
-            # Validate questions
-            valid_questions = [
-                q for q in questions
-                if isinstance(q, dict) and
-                all(key in q for key in ["question", "options", "answer", "explanation"]) and
-                isinstance(q["options"], list) and len(q["options"]) == 4 and
-                q["answer"] in q["options"]
-            ]
-            if len(valid_questions) < 15:
-                logger.warning(f"LLM returned only {len(valid_questions)} valid questions. Expected 15–20.")
-            return valid_questions[:20]  # Cap at 20
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse LLM response as JSON: {response_text}")
-            return []
+        valid_questions = _request_questions(client, build_quiz_prompt(), 4000, use_cache)
+        if len(valid_questions) < 15:
+            logger.warning(f"LLM returned only {len(valid_questions)} valid questions. Expected 15–20.")
+        return valid_questions[:target]  # Cap at 20
     except Exception as e:
         logger.error(f"EuriaiClient request failed: {str(e)}")
         return []
+
+
+@st.cache_resource
+def get_question_pool():
+    """
+    Start the background worker that keeps unserved LLM Quiz questions above the low watermark.
+    Cached as a resource so it runs once per process.
+    """
+    return QuestionPoolWorker(generate_llm_questions, question_bank.SOURCE_CAF_WAF).start()
+
+
+def stream_llm_questions(max_questions=LLM_QUIZ_LENGTH):
+    """
+    Stream the full LLM Quiz generation and yield each valid question as soon as its JSON
+    object is complete, storing it in the question bank as it arrives.
+    """
+    client = _create_client()
+    if client is None:
+        return
+    chunks = client.stream_completion(
+        prompt=build_quiz_prompt(),
+        temperature=0.7,
+        max_tokens=4000
+    )
+    count = 0
+    for question in iter_stream_questions(chunks):
+        # Near-duplicates of earlier generations (or of this one) are not shown
+        if not question_bank.add_new_questions([question], question_bank.SOURCE_CAF_WAF, served=True):
+            continue
+        yield question
+        count += 1
+        if count >= max_questions:
+            break
+    if count < max_questions:
+        logger.warning(f"Streamed generation returned only {count} valid questions. Expected {max_questions}.")
+
+
+def open_llm_quiz(count=LLM_QUIZ_LENGTH):
+    """
+    Start an LLM Quiz. Returns a QuestionStream that is already complete when the question
+    bank has `count` unserved questions; otherwise questions are streamed from the LLM so the
+    first one can be shown before the whole generation finishes.
+    """
+    pool = get_question_pool()
+    client = _create_client()
+    if question_bank.count_questions(question_bank.SOURCE_CAF_WAF, unserved_only=True) >= count:
+        stream = QuestionStream.from_list(question_bank.draw_questions(question_bank.SOURCE_CAF_WAF, count))
+    elif client is None or not client.healthy:
+        # Provider unhealthy: serve whatever the bank has right away; an empty quiz falls back to static questions
+        stream = QuestionStream.from_list(question_bank.draw_questions(question_bank.SOURCE_CAF_WAF, count))
+    else:
+        stream = QuestionStream(stream_llm_questions, expected=count)
+    pool.notify()
+    return stream
@@ -1,150 +1,245 @@
+import time
+_run_started = time.perf_counter()
+import logging
 import streamlit as st
-import random
 import json
-from llm_utils import generate_llm_questions
+import uuid
+import telemetry
+from content_packs import ContentLibrary
+from spaced_repetition import GRADES, FlashcardScheduler
+from progress_store import QUIZ_LLM, QUIZ_STATIC, get_progress_store
+# llm_utils (LLM SDK, question bank) is imported on the LLM Quiz page only,
+# adaptive_quiz (NumPy) on the Static Quiz page only, analytics (pandas) on the Analytics page only
+
+STATIC_QUIZ_LENGTH = 15
+
+logger = logging.getLogger(__name__)
 
 # Streamlit App Configuration
 st.set_page_config(page_title="AWS Cloud Practitioner Study App", layout="wide")
 
-# Data for Flashcards
-flashcards = [
-    {"front": "CAF: Business Perspective", "back": "Aligns cloud with business goals (e.g., growth, innovation). Involves CEO, CFO, CTO. Focus: Strategy, portfolio, data monetization. Metaphor: Mayor’s office."},
-    {"front": "CAF: People Perspective", "back": "Prepares employees for cloud via training and cultural change. Involves HR, CISO. Focus: Cloud fluency, workforce transformation. Metaphor: HR/training department."},
-    {"front": "CAF: Governance Perspective", "back": "Manages risks, costs, compliance. Involves CIO, CFO. Focus: Risk management, cloud financial management. Metaphor: City council."},
-    {"front": "CAF: Platform Perspective", "back": "Builds scalable cloud infrastructure. Involves CTO, architects. Focus: Platform architecture, CI/CD. Metaphor: Engineering team."},
-    {"front": "CAF: Security Perspective", "back": "Protects data and systems. Involves CISO, security engineers. Focus: IAM, threat detection. Metaphor: Police/cybersecurity team."},
-    {"front": "CAF: Operations Perspective", "back": "Ensures reliable cloud operations. Involves SREs, IT managers. Focus: Observability, incident management. Metaphor: Maintenance crew."},
-    {"front": "CAF: Envision Phase", "back": "Define cloud goals tied to business outcomes. Example: Reduce IT costs by 20%. Metaphor: Dreaming up the ideal city."},
-    {"front": "CAF: Align Phase", "back": "Identify gaps and plan readiness. Example: Train staff on AWS. Metaphor: Planning the city’s transition."},
-    {"front": "CAF: Launch Phase", "back": "Deploy pilot projects. Example: Move one app to AWS. Metaphor: Building a neighborhood."},
-    {"front": "CAF: Scale Phase", "back": "Expand pilots to full scale. Example: Migrate all apps. Metaphor: Growing the city."},
-    {"front": "WAF: Operational Excellence", "back": "Run/monitor workloads effectively. Focus: Automate operations, small changes. Example: Use CloudFormation. Metaphor: Project manager."},
-    {"front": "WAF: Security", "back": "Protect data/systems. Focus: Encrypt, IAM, traceability. Example: Use KMS. Metaphor: Security system."},
-    {"front": "WAF: Reliability", "back": "Ensure recovery/consistency. Focus: Auto-recover, scale. Example: EC2 Auto Scaling. Metaphor: Foundation."},
-    {"front": "WAF: Performance Efficiency", "back": "Use resources efficiently. Focus: Serverless, global delivery. Example: Lambda. Metaphor: Plumbing/electrical."},
-    {"front": "WAF: Cost Optimization", "back": "Minimize costs. Focus: Pay-as-you-go, monitor spending. Example: Cost Explorer. Metaphor: Budget planner."},
-    {"front": "WAF: Sustainability", "back": "Minimize environmental impact. Focus: Efficient tech, optimize resources. Example: Serverless. Metaphor: Eco-designer."},
-]
-
-# Static Quiz Questions (Fallback)
-static_quiz_questions = [
-    {
-        "question": "What is the primary purpose of the AWS Cloud Adoption Framework (CAF)?",
-        "options": ["Design secure workloads", "Guide organizations to adopt the cloud", "Optimize cloud costs", "Automate infrastructure"],
-        "answer": "Guide organizations to adopt the cloud",
-        "explanation": "The CAF provides a structured approach to transition to the cloud, aligning people, processes, and technology."
-    },
-    {
-        "question": "Which CAF perspective focuses on training employees for cloud adoption?",
-        "options": ["Business", "People", "Governance", "Platform"],
-        "answer": "People",
-        "explanation": "The People Perspective prepares employees through training and cultural change, like the HR department in the city metaphor."
-    },
-    {
-        "question": "A retail company wants to migrate its e-commerce platform to AWS. Which CAF phase involves deploying a pilot project?",
-        "options": ["Envision", "Align", "Launch", "Scale"],
-        "answer": "Launch",
-        "explanation": "The Launch phase tests small-scale pilots, like moving one app to AWS, to prove value."
-    },
-    {
-        "question": "What does the Governance Perspective in AWS CAF primarily address?",
-        "options": ["Building cloud infrastructure", "Managing risks and compliance", "Protecting data", "Running operations"],
-        "answer": "Managing risks and compliance",
-        "explanation": "Governance sets rules for risk management, cost control, and compliance, like a city council."
-    },
-    {
-        "question": "In the CAF, what is the role of the Security Perspective?",
-        "options": ["Ensure operational efficiency", "Protect data and workloads", "Align business goals", "Train employees"],
-        "answer": "Protect data and workloads",
-        "explanation": "Security focuses on confidentiality, integrity, and availability, like the police in the city metaphor."
-    },
-    {
-        "question": "What is the main goal of the AWS Well-Architected Framework (WAF)?",
-        "options": ["Plan cloud migration", "Design/optimize cloud workloads", "Train staff on AWS", "Manage cloud costs"],
-        "answer": "Design/optimize cloud workloads",
-        "explanation": "The WAF provides best practices to build secure, reliable, and efficient cloud architectures."
-    },
-    {
-        "question": "Which WAF pillar ensures workloads recover from failures?",
-        "options": ["Security", "Reliability", "Performance Efficiency", "Cost Optimization"],
-        "answer": "Reliability",
-        "explanation": "Reliability focuses on consistent performance and recovery, like a strong house foundation."
-    },
-    {
-        "question": "A FinTech company processes payments on AWS. Which WAF pillar is critical for PCI DSS compliance?",
-        "options": ["Operational Excellence", "Security", "Cost Optimization", "Sustainability"],
-        "answer": "Security",
-        "explanation": "Security ensures data protection and compliance, using tools like IAM and KMS."
-    },
-    {
-        "question": "What tool helps review cloud architectures against WAF best practices?",
-        "options": ["AWS Config", "AWS Trusted Advisor", "AWS Well-Architected Tool", "AWS Cost Explorer"],
-        "answer": "AWS Well-Architected Tool",
-        "explanation": "The WA Tool is a free console for checking workloads and identifying improvements."
-    },
-    {
-        "question": "Which WAF pillar focuses on minimizing environmental impact?",
-        "options": ["Performance Efficiency", "Cost Optimization", "Sustainability", "Operational Excellence"],
-        "answer": "Sustainability",
-        "explanation": "Sustainability optimizes resource use to reduce carbon footprint, like eco-friendly house design."
-    },
-    {
-        "question": "A company notices high AWS bills. Which WAF pillar helps address this?",
-        "options": ["Reliability", "Cost Optimization", "Security", "Performance Efficiency"],
-        "answer": "Cost Optimization",
-        "explanation": "Cost Optimization uses tools like Cost Explorer to deliver value at the lowest cost."
-    },
-    {
-        "question": "In the CAF, what does the Platform Perspective involve?",
-        "options": ["Training staff", "Building scalable cloud infrastructure", "Managing budgets", "Ensuring uptime"],
-        "answer": "Building scalable cloud infrastructure",
-        "explanation": "Platform focuses on cloud-native solutions and architecture, like the engineering team."
-    },
-    {
-        "question": "A company tests disaster recovery in AWS. Which WAF pillar does this align with?",
-        "options": ["Operational Excellence", "Reliability", "Security", "Performance Efficiency"],
-        "answer": "Reliability",
-        "explanation": "Reliability emphasizes testing recovery procedures to ensure resilience."
-    },
-    {
-        "question": "Which CAF phase sets cloud goals tied to business outcomes?",
-        "options": ["Envision", "Align", "Launch", "Scale"],
-        "answer": "Envision",
-        "explanation": "Envision defines strategic objectives, like dreaming up the ideal city."
-    },
-    {
-        "question": "What is a key difference between CAF and WAF?",
-        "options": ["CAF is for cost management; WAF is for security", "CAF is for adoption; WAF is for design/optimization", "CAF is for tools; WAF is for training", "CAF is for startups; WAF is for enterprises"],
-        "answer": "CAF is for adoption; WAF is for design/optimization",
-        "explanation": "CAF guides cloud adoption (strategy), while WAF optimizes workloads (technical)."
-    },
-    {
-        "question": "A startup uses serverless AWS Lambda to reduce costs. Which WAF pillar is this?",
-        "options": ["Performance Efficiency", "Cost Optimization", "Sustainability", "All of the above"],
-        "answer": "All of the above",
-        "explanation": "Serverless improves efficiency (Performance), reduces costs (Cost Optimization), and minimizes resource use (Sustainability)."
-    },
-    {
-        "question": "Which CAF perspective involves the CEO and CFO?",
-        "options": ["People", "Governance", "Business", "Operations"],
-        "answer": "Business",
-        "explanation": "Business Perspective aligns cloud with business goals, involving executives like CEO/CFO."
-    },
-    {
-        "question": "A company uses CloudWatch to monitor workloads. Which WAF pillar is this?",
-        "options": ["Operational Excellence", "Security", "Reliability", "Performance Efficiency"],
-        "answer": "Operational Excellence",
-        "explanation": "Operational Excellence uses monitoring tools like CloudWatch to run workloads effectively."
-    },
-]
+@st.cache_resource
+def get_content_library():
+    # Shared by every session; pack items are only read from disk when sampled
+    return ContentLibrary()
+
+@st.cache_resource
+def get_item_pool():
+    # Difficulties come from the last `python adaptive_quiz.py` calibration, read once per process
+    from adaptive_quiz import ItemPool
+    return ItemPool.from_library(get_content_library())
+
+@st.cache_data(ttl=60)
+def get_cohort_totals():
+    # Every learner's per-domain totals; the cohort changes slowly, so a minute-old view is fine
+    from analytics import learner_totals
+    rows = get_progress_store().domain_totals()
+    return learner_totals(rows) if rows else None
+
+def flip_card():
+    st.session_state.show_front = not st.session_state.show_front
+
+def grade_card(scheduler, card_id, grade):
+    scheduler.grade(card_id, grade)
+    st.session_state.show_front = True
+
+def question_shown_at(quiz, index):
+    # When question `index` of `quiz` was first rendered, for response times
+    shown = st.session_state.get(f"{quiz}_shown")
+    if shown is None or shown[0] != index:
+        shown = (index, time.time())
+        st.session_state[f"{quiz}_shown"] = shown
+    return shown[1]
+
+def record_answer(learner, quiz, question, user_answer, index):
+    get_progress_store().record(
+        learner, quiz, question["question"], user_answer, user_answer == question["answer"],
+        domain=question.get("domain"),
+        response_seconds=time.time() - question_shown_at(quiz, index),
+        session_id=st.session_state.session_id
+    )
+
+# Fragments: a button or radio inside one reruns only that function, not the whole page
+@st.fragment
+def flashcard_review(learner):
+    library = get_content_library()
+    scheduler = st.session_state.get("flashcard_scheduler")
+    if scheduler is None or scheduler.learner != learner:
+        scheduler = FlashcardScheduler(learner, library.ids("flashcards"))
+        st.session_state.flashcard_scheduler = scheduler
+        st.session_state.show_front = True
+
+    next_card = scheduler.next_card()
+    if next_card is None:
+        st.info("No flashcards available.")
+        return
+    card_id, due = next_card
+    due_count, new_count = scheduler.counts()
+    st.caption(f"Due now: {due_count} · New: {new_count} · Deck: {len(scheduler)}")
+    wait = due - time.time()
+    if wait > 0:
+        wait_text = f"{wait / 3600:.1f} hours" if wait >= 3600 else f"{max(1, round(wait / 60))} min"
+        st.success(f"All caught up! The next card is due in {wait_text}; you can keep reviewing ahead of schedule.")
+
+    card = library.get("flashcards", card_id)
+    if st.session_state.show_front:
+        st.subheader("Front")
+        st.write(card["front"])
+        st.button("Flip Card", on_click=flip_card)
+    else:
+        st.subheader("Back")
+        st.write(card["back"])
+        # Grading in a callback reschedules the card before the next card is rendered
+        for col, grade in zip(st.columns(len(GRADES)), GRADES):
+            with col:
+                st.button(grade, on_click=grade_card, args=(scheduler, card_id, grade))
+
+@st.fragment
+def static_quiz_questions(learner, selector, question_count):
+    from adaptive_quiz import skill_label
+    library = get_content_library()
+    weakest = [skill_label(skill) for skill, _ in selector.mastery()[:3]]
+    if weakest:
+        st.caption("Weakest topics: " + ", ".join(weakest))
+
+    if "static_quiz_score" not in st.session_state:
+        st.session_state.static_quiz_score = 0
+        st.session_state.static_quiz_index = 0
+        st.session_state.static_quiz_questions = []
+        st.session_state.static_user_answers = []
+        selector.new_quiz()
+
+    # The next question is picked once the previous one is answered, from the updated abilities
+    if st.session_state.static_quiz_index == len(st.session_state.static_quiz_questions) < question_count:
+        item_id = selector.next_item()
+        if item_id is not None:
+            st.session_state.static_quiz_questions.append(library.get("questions", item_id))
+            st.session_state.static_user_answers.append(None)
+
+    if st.session_state.static_quiz_index < len(st.session_state.static_quiz_questions):
+        question = st.session_state.static_quiz_questions[st.session_state.static_quiz_index]
+        st.subheader(f"Question {st.session_state.static_quiz_index + 1}")
+        st.write(question["question"])
+        user_answer = st.radio("Select an answer:", question["options"], key=f"static_q{st.session_state.static_quiz_index}")
+
+        question_shown_at(QUIZ_STATIC, st.session_state.static_quiz_index)
+        if st.button("Submit Answer"):
+            st.session_state.static_user_answers[st.session_state.static_quiz_index] = user_answer
+            record_answer(learner, QUIZ_STATIC, question, user_answer, st.session_state.static_quiz_index)
+            selector.update(question["id"], user_answer == question["answer"])
+            if user_answer == question["answer"]:
+                st.session_state.static_quiz_score += 1
+                st.success("Correct!")
+            else:
+                st.error(f"Incorrect. The answer is: {question['answer']}")
+            st.write(f"Explanation: {question['explanation']}")
+            st.session_state.static_quiz_index += 1
+            st.button("Next Question")
+    else:
+        st.subheader("Static Quiz Completed!")
+        st.write(f"Your Score: {st.session_state.static_quiz_score}/{len(st.session_state.static_quiz_questions)}")
+        percentage = (st.session_state.static_quiz_score / len(st.session_state.static_quiz_questions)) * 100
+        st.write(f"Percentage: {percentage:.2f}%")
+        if percentage >= 80:
+            st.balloons()
+            st.write("Great job! You're ready for the exam!")
+        else:
+            st.write("Keep practicing with flashcards and try the LLM Quiz!")
+        if st.button("Restart Static Quiz"):
+            st.session_state.static_quiz_score = 0
+            st.session_state.static_quiz_index = 0
+            st.session_state.static_user_answers = []
+            st.session_state.static_quiz_questions = []
+            selector.new_quiz()
+
+@st.fragment
+def llm_quiz_questions(learner):
+    from llm_utils import LLM_QUIZ_LENGTH, open_llm_quiz
+    if "llm_quiz_score" not in st.session_state:
+        st.session_state.llm_quiz_score = 0
+        st.session_state.llm_quiz_index = 0
+        st.session_state.llm_quiz_questions = []
+        st.session_state.llm_user_answers = []
+        st.session_state.llm_quiz_stream = None
+
+    # Open the quiz from the question bank, or stream it from the LLM, if not already started
+    if not st.session_state.llm_quiz_questions and st.session_state.llm_quiz_stream is None:
+        try:
+            st.session_state.llm_quiz_stream = open_llm_quiz()
+            # Shared list: questions appear here as the stream produces them
+            st.session_state.llm_quiz_questions = st.session_state.llm_quiz_stream.questions
+        except Exception as e:
+            st.error(f"Error fetching LLM questions: {str(e)}. Using static questions.")
+            st.session_state.llm_quiz_questions = get_content_library().sample("questions", LLM_QUIZ_LENGTH)
+            st.session_state.llm_user_answers = [None] * len(st.session_state.llm_quiz_questions)
+
+    stream = st.session_state.llm_quiz_stream
+    if stream is not None:
+        # Only wait until the question about to be shown has been generated
+        if not stream.done and len(stream.questions) <= st.session_state.llm_quiz_index:
+            with st.spinner("Generating the next question..."):
+                ready = stream.wait_for(st.session_state.llm_quiz_index + 1)
+            if not ready and not stream.done:
+                st.warning("Question generation is taking longer than expected. Please try again in a moment.")
+                return
+        if stream.done:
+            st.session_state.llm_quiz_stream = None
+            if not stream.questions:
+                st.warning("LLM failed to generate questions. Using static questions as fallback.")
+                st.session_state.llm_quiz_questions = get_content_library().sample("questions", LLM_QUIZ_LENGTH)
+        # Answers grow with the question list while it is still streaming
+        missing = len(st.session_state.llm_quiz_questions) - len(st.session_state.llm_user_answers)
+        st.session_state.llm_user_answers.extend([None] * missing)
+
+    if st.session_state.llm_quiz_index < len(st.session_state.llm_quiz_questions):
+        question = st.session_state.llm_quiz_questions[st.session_state.llm_quiz_index]
+        st.subheader(f"Question {st.session_state.llm_quiz_index + 1}")
+        st.write(question["question"])
+        user_answer = st.radio("Select an answer:", question["options"], key=f"llm_q{st.session_state.llm_quiz_index}")
+
+        question_shown_at(QUIZ_LLM, st.session_state.llm_quiz_index)
+        if st.button("Submit Answer"):
+            st.session_state.llm_user_answers[st.session_state.llm_quiz_index] = user_answer
+            record_answer(learner, QUIZ_LLM, question, user_answer, st.session_state.llm_quiz_index)
+            if user_answer == question["answer"]:
+                st.session_state.llm_quiz_score += 1
+                st.success("Correct!")
+            else:
+                st.error(f"Incorrect. The answer is: {question['answer']}")
+            st.write(f"Explanation: {question['explanation']}")
+            st.session_state.llm_quiz_index += 1
+            st.button("Next Question")
+    else:
+        st.subheader("LLM Quiz Completed!")
+        st.write(f"Your Score: {st.session_state.llm_quiz_score}/{len(st.session_state.llm_quiz_questions)}")
+        percentage = (st.session_state.llm_quiz_score / len(st.session_state.llm_quiz_questions)) * 100
+        st.write(f"Percentage: {percentage:.2f}%")
+        if percentage >= 80:
+            st.balloons()
+            st.write("Great job! You're ready for the exam!")
+        else:
+            st.write("Keep practicing with flashcards and try again!")
+        if st.button("Restart LLM Quiz"):
+            st.session_state.llm_quiz_score = 0
+            st.session_state.llm_quiz_index = 0
+            st.session_state.llm_quiz_questions = []
+            st.session_state.llm_user_answers = []
+            st.session_state.llm_quiz_stream = None
 
 # Streamlit App
 def main():
     st.title("AWS Cloud Practitioner Study App")
     st.markdown("Learn **AWS Cloud Adoption Framework (CAF)** and **Well-Architected Framework (WAF)**, practice with flashcards, and test your knowledge with static or LLM-generated quizzes!")
+    if "first_paint_ms" not in st.session_state:
+        st.session_state.first_paint_ms = (time.perf_counter() - _run_started) * 1000
+        logger.info(f"Time to first paint: {st.session_state.first_paint_ms:.0f} ms")
 
     # Sidebar Navigation
-    page = st.sidebar.selectbox("Choose a Page", ["Home", "AWS CAF", "AWS WAF", "Flashcards", "Static Quiz", "LLM Quiz"])
+    page = st.sidebar.selectbox("Choose a Page", ["Home", "AWS CAF", "AWS WAF", "Flashcards", "Static Quiz", "LLM Quiz", "Analytics"])
+    # Flashcard progress is saved per learner name
+    learner = st.sidebar.text_input("Learner name", value="guest").strip() or "guest"
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
     if page == "Home":
         st.header("Welcome to the AWS Study App")
@@ -222,126 +317,89 @@ def main():
 
     elif page == "Flashcards":
         st.header("Flashcards for AWS CAF and WAF")
-        st.markdown("Click 'Next Card' to cycle through flashcards. Use these to memorize key terms!")
-
-        if "flashcard_index" not in st.session_state:
-            st.session_state.flashcard_index = 0
-            st.session_state.show_front = True
+        st.markdown("Recall the answer, flip the card, then rate how well you knew it. Cards you find hard come back sooner; cards you know well are spaced further apart.")
 
-        card = flashcards[st.session_state.flashcard_index]
-        if st.session_state.show_front:
-            st.subheader("Front")
-            st.write(card["front"])
-        else:
-            st.subheader("Back")
-            st.write(card["back"])
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Flip Card"):
-                st.session_state.show_front = not st.session_state.show_front
-        with col2:
-            if st.button("Next Card"):
-                st.session_state.flashcard_index = (st.session_state.flashcard_index + 1) % len(flashcards)
-                st.session_state.show_front = True
+        flashcard_review(learner)
 
     elif page == "Static Quiz":
         st.header("Static Quiz")
-        st.markdown("Test your knowledge with 18 predefined questions. Select an answer and submit to see feedback!")
+        from adaptive_quiz import AdaptiveSelector
+        library = get_content_library()
+        question_count = min(STATIC_QUIZ_LENGTH, library.count("questions"))
+        st.markdown(f"Test your knowledge with {question_count} predefined questions, picked to focus on your weakest topics. Select an answer and submit to see feedback!")
 
-        if "static_quiz_score" not in st.session_state:
-            st.session_state.static_quiz_score = 0
-            st.session_state.static_quiz_index = 0
-            st.session_state.static_quiz_questions = random.sample(static_quiz_questions, len(static_quiz_questions))
-            st.session_state.static_user_answers = [None] * len(st.session_state.static_quiz_questions)
-
-        if st.session_state.static_quiz_index < len(st.session_state.static_quiz_questions):
-            question = st.session_state.static_quiz_questions[st.session_state.static_quiz_index]
-            st.subheader(f"Question {st.session_state.static_quiz_index + 1}")
-            st.write(question["question"])
-            user_answer = st.radio("Select an answer:", question["options"], key=f"static_q{st.session_state.static_quiz_index}")
-            
-            if st.button("Submit Answer"):
-                st.session_state.static_user_answers[st.session_state.static_quiz_index] = user_answer
-                if user_answer == question["answer"]:
-                    st.session_state.static_quiz_score += 1
-                    st.success("Correct!")
-                else:
-                    st.error(f"Incorrect. The answer is: {question['answer']}")
-                st.write(f"Explanation: {question['explanation']}")
-                st.session_state.static_quiz_index += 1
-                st.button("Next Question")
-        else:
-            st.subheader("Static Quiz Completed!")
-            st.write(f"Your Score: {st.session_state.static_quiz_score}/{len(st.session_state.static_quiz_questions)}")
-            percentage = (st.session_state.static_quiz_score / len(st.session_state.static_quiz_questions)) * 100
-            st.write(f"Percentage: {percentage:.2f}%")
-            if percentage >= 80:
-                st.balloons()
-                st.write("Great job! You're ready for the exam!")
-            else:
-                st.write("Keep practicing with flashcards and try the LLM Quiz!")
-            if st.button("Restart Static Quiz"):
-                st.session_state.static_quiz_score = 0
-                st.session_state.static_quiz_index = 0
-                st.session_state.static_user_answers = [None] * len(st.session_state.static_quiz_questions)
-                st.session_state.static_quiz_questions = random.sample(static_quiz_questions, len(static_quiz_questions))
+        selector = st.session_state.get("adaptive_selector")
+        if selector is None or selector.learner != learner:
+            selector = AdaptiveSelector(get_item_pool(), learner)
+            st.session_state.adaptive_selector = selector
+        static_quiz_questions(learner, selector, question_count)
 
     elif page == "LLM Quiz":
         st.header("LLM-Generated Quiz")
-        st.markdown("Test your knowledge with 15–20 dynamic questions generated by an AI model. Questions vary each time!")
+        from llm_utils import LLM_QUIZ_LENGTH, get_question_pool
+        st.markdown(f"Test your knowledge with {LLM_QUIZ_LENGTH} dynamic questions generated by an AI model. Questions vary each time!")
 
-        if "llm_quiz_score" not in st.session_state:
-            st.session_state.llm_quiz_score = 0
-            st.session_state.llm_quiz_index = 0
-            st.session_state.llm_quiz_questions = []
-            st.session_state.llm_user_answers = []
+        # Keep the LLM Quiz question pool topped up in the background once anyone opens this page
+        get_question_pool()
 
-        # Fetch LLM questions if not already generated
-        if not st.session_state.llm_quiz_questions:
-            try:
-                st.session_state.llm_quiz_questions = generate_llm_questions()
-                st.session_state.llm_user_answers = [None] * len(st.session_state.llm_quiz_questions)
-                if not st.session_state.llm_quiz_questions:
-                    st.warning("LLM failed to generate questions. Using static questions as fallback.")
-                    st.session_state.llm_quiz_questions = random.sample(static_quiz_questions, min(15, len(static_quiz_questions)))
-                    st.session_state.llm_user_answers = [None] * len(st.session_state.llm_quiz_questions)
-            except Exception as e:
-                st.error(f"Error fetching LLM questions: {str(e)}. Using static questions.")
-                st.session_state.llm_quiz_questions = random.sample(static_quiz_questions, min(15, len(static_quiz_questions)))
-                st.session_state.llm_user_answers = [None] * len(st.session_state.llm_quiz_questions)
-
-        if st.session_state.llm_quiz_index < len(st.session_state.llm_quiz_questions):
-            question = st.session_state.llm_quiz_questions[st.session_state.llm_quiz_index]
-            st.subheader(f"Question {st.session_state.llm_quiz_index + 1}")
-            st.write(question["question"])
-            user_answer = st.radio("Select an answer:", question["options"], key=f"llm_q{st.session_state.llm_quiz_index}")
-            
-            if st.button("Submit Answer"):
-                st.session_state.llm_user_answers[st.session_state.llm_quiz_index] = user_answer
-                if user_answer == question["answer"]:
-                    st.session_state.llm_quiz_score += 1
-                    st.success("Correct!")
-                else:
-                    st.error(f"Incorrect. The answer is: {question['answer']}")
-                st.write(f"Explanation: {question['explanation']}")
-                st.session_state.llm_quiz_index += 1
-                st.button("Next Question")
-        else:
-            st.subheader("LLM Quiz Completed!")
-            st.write(f"Your Score: {st.session_state.llm_quiz_score}/{len(st.session_state.llm_quiz_questions)}")
-            percentage = (st.session_state.llm_quiz_score / len(st.session_state.llm_quiz_questions)) * 100
-            st.write(f"Percentage: {percentage:.2f}%")
-            if percentage >= 80:
-                st.balloons()
-                st.write("Great job! You're ready for the exam!")
-            else:
-                st.write("Keep practicing with flashcards and try again!")
-            if st.button("Restart LLM Quiz"):
-                st.session_state.llm_quiz_score = 0
-                st.session_state.llm_quiz_index = 0
-                st.session_state.llm_quiz_questions = []
-                st.session_state.llm_user_answers = []
+        llm_quiz_questions(learner)
+
+    elif page == "Analytics":
+        st.header("Performance Analytics")
+        st.markdown("Your accuracy and pace per domain, how they are trending, and how you compare with other learners. Aim for at least 80% in every domain!")
+        from analytics import TREND_DAYS, accuracy_trend, cohort_summary, daily_frame, domain_summary
+        # Pre-aggregated daily totals: a few rows per day, however many answers are logged
+        rows = get_progress_store().daily_stats(learner)
+        if not rows:
+            st.info("No answers recorded yet. Take a quiz to see your analytics here.")
+            return
+        df = daily_frame(rows)
+        summary = domain_summary(df)
+        answers = int(summary["answers"].sum())
+        timed = summary["timed"].sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Answers", f"{answers:,}")
+        col2.metric("Accuracy", f"{summary['correct'].sum() / answers:.0%}")
+        col3.metric("Seconds per question", f"{summary['seconds'].sum() / timed:.1f}" if timed else "–")
+
+        st.subheader("By domain")
+        st.dataframe(
+            summary[["answers", "accuracy", "seconds_per_question", "trend", "target_met"]].rename(columns={
+                "answers": "Answers", "accuracy": "Accuracy", "seconds_per_question": "Seconds per question",
+                "trend": f"Trend ({TREND_DAYS} days)", "target_met": "80% reached"
+            }),
+            column_config={
+                "Accuracy": st.column_config.NumberColumn(format="percent"),
+                f"Trend ({TREND_DAYS} days)": st.column_config.NumberColumn(format="percent"),
+                "Seconds per question": st.column_config.NumberColumn(format="%.1f")
+            }
+        )
+
+        st.subheader(f"Accuracy trend ({TREND_DAYS}-day rolling)")
+        st.line_chart(accuracy_trend(df))
+
+        st.subheader("Compared with other learners")
+        totals = get_cohort_totals()
+        if totals is None:
+            st.info("Not enough learners yet for a comparison.")
+            return
+        cohort = cohort_summary(totals, learner)
+        st.dataframe(
+            cohort[["accuracy", "cohort_median", "percentile", "learners"]].rename(columns={
+                "accuracy": "Your accuracy", "cohort_median": "Median accuracy",
+                "percentile": "Percentile", "learners": "Learners"
+            }),
+            column_config={
+                "Your accuracy": st.column_config.NumberColumn(format="percent"),
+                "Median accuracy": st.column_config.NumberColumn(format="percent"),
+                "Percentile": st.column_config.NumberColumn(format="percent")
+            }
+        )
 
 if __name__ == "__main__":
-    main()
+    # No-op unless TELEMETRY_PORT is set
+    telemetry.start_metrics_server()
+    try:
+        main()
+    finally:
+        telemetry.record_span("rerun", time.perf_counter() - _run_started, attributes={"app": "main"})
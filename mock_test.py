@@ -0,0 +1,180 @@
+import logging
+
+import requests
+import streamlit as st
+
+import question_bank
+from llm_client import get_llm_client
+from llm_parsing import extract_response_text, iter_stream_questions, parse_json_array
+from notes_index import NotesIndex, load_or_build_index
+from notes_snapshot import GITHUB_NOTES_URL, NOTES_TTL_SECONDS, load_notes
+from question_stream import QuestionStream
+
+logger = logging.getLogger(__name__)
+
+MOCK_TEST_MODEL = "gemini-2.5-pro-exp-03-25"
+
+def get_client():
+    """
+    Shared Gemini 2.5 Pro Exp client (rate limited, retried, circuit-broken), reused across reruns.
+    Raises KeyError if no EURIAI_API_KEY is configured.
+    """
+    return get_llm_client(MOCK_TEST_MODEL)
+
+# Step 1: Load the Preprocessed Notes Snapshot (scraped from GitHub)
+@st.cache_resource(ttl=NOTES_TTL_SECONDS)
+def get_notes_snapshot(url):
+    """
+    Load the notes snapshot once per process. After the TTL it is revalidated against GitHub;
+    reruns in between never touch the network.
+    """
+    return load_notes(url)
+
+@st.cache_resource
+def get_notes_index(url, version):
+    """
+    BM25 index over the notes, built once per snapshot version and persisted to disk.
+    """
+    return load_or_build_index(get_notes_snapshot(url))
+
+def get_mock_notes_index():
+    # The notes are only fetched when the first mock test prompt is built
+    try:
+        snapshot = get_notes_snapshot(GITHUB_NOTES_URL)
+    except (requests.RequestException, OSError):
+        # Not cached, so the next prompt tries to fetch the notes again
+        logger.warning("Building the mock test prompt without notes.")
+        return NotesIndex.build("", "empty")
+    return get_notes_index(GITHUB_NOTES_URL, snapshot["version"])
+
+# Topics the mock test covers; only the notes chunks most relevant to them go into the prompt
+MOCK_TEST_TOPICS = [
+    "Cloud Concepts, Digital Transformation",
+    "Global Infrastructure, Cloud Architecture",
+    "Shared Responsibility Model, Compute (EC2)",
+    "Storage Services (S3)",
+    "Databases & Networking (VPC, RDS)",
+    "IAM Best Practices, Containers",
+    "Governance, Serverless, ML & AI",
+    "Well-Architected Framework, Billing",
+]
+
+# Step 2: Generate Scenario-Based Questions Using LLM
+def build_mock_prompt(num_questions=5, topics=MOCK_TEST_TOPICS, notes_index=None):
+    # Callers outside the app (e.g. bulk_generate --stub) pass their own index to stay offline
+    if notes_index is None:
+        notes_index = get_mock_notes_index()
+    notes_context = notes_index.build_context(topics)
+    topic_list = "\n    ".join(f"- {topic}" for topic in topics)
+    return f"""
+    You are an expert exam creator for the AWS Certified Cloud Practitioner (CLF-C01) exam. Using the following notes and topics, generate {num_questions} scenario-based multiple-choice questions. Each question should have 4 options, with one correct answer. Provide the question, options, correct answer, and a brief explanation.
+
+    ### Notes:
+    {notes_context}
+
+    ### Topics to Focus On:
+    {topic_list}
+
+    ### Format:
+    Return the questions in JSON format:
+    [
+        {{
+            "question": "Scenario-based question here",
+            "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+            "correct_answer": "Correct Option",
+            "explanation": "Brief explanation of the correct answer"
+        }},
+        ...
+    ]
+    """
+
+def stream_mock_questions(num_questions=5):
+    """
+    Stream the mock test generation and yield each valid question as soon as it is complete.
+    """
+    chunks = get_client().stream_completion(
+        prompt=build_mock_prompt(num_questions),
+        temperature=0.7,
+        max_tokens=1500
+    )
+    for question in iter_stream_questions(chunks, answer_key="correct_answer"):
+        # Near-duplicates of earlier generations (or of this one) are not shown
+        if question_bank.add_new_questions([question], question_bank.SOURCE_MOCK_TEST, served=True):
+            yield question
+
+def open_mock_test(num_questions=5):
+    """
+    Serve a mock test from the local question bank, or stream new questions from the LLM when it runs short.
+    Raises KeyError if the LLM is needed but no EURIAI_API_KEY is configured.
+    """
+    if question_bank.count_questions(question_bank.SOURCE_MOCK_TEST, unserved_only=True) < num_questions:
+        # Fail here rather than in the stream thread when no API key is configured
+        get_client()
+        return QuestionStream(lambda: stream_mock_questions(num_questions), expected=num_questions)
+    questions = question_bank.draw_questions(question_bank.SOURCE_MOCK_TEST, num_questions)
+    # The mock test reads "correct_answer"; the bank stores the LLM Quiz "answer" key
+    return QuestionStream.from_list([dict(q, correct_answer=q.pop("answer")) for q in questions])
+
+def explain_wrong_answers(answers):
+    """
+    Replace the default explanation of each wrong answer with a tailored one.
+    Explanations are cached per question and answer; all cache misses are requested
+    from the LLM in a single batched call. Returns a message for the user if some
+    explanations could not be fetched, else None.
+    """
+    missing = []
+    for answer in answers:
+        if answer["score"] == 1 or answer.get("tailored"):
+            continue
+        cached = question_bank.get_feedback(answer["question"], answer["user_answer"])
+        if cached is not None:
+            answer["explanation"] = cached
+            answer["tailored"] = True
+        else:
+            missing.append(answer)
+    if not missing:
+        return None
+
+    items = "\n".join(
+        f'{i + 1}. Question: {answer["question"]}\n   Correct Answer: {answer["correct_answer"]}\n   User\'s Answer: {answer["user_answer"]}'
+        for i, answer in enumerate(missing)
+    )
+    prompt = f"""
+    The user answered the following AWS Certified Cloud Practitioner questions incorrectly. For each one, briefly explain why the user's answer is wrong and why the correct answer is right.
+
+    {items}
+
+    Format:
+    [
+        {{
+            "id": 1,
+            "explanation": "Explanation for question 1"
+        }},
+        ...
+    ]
+    """
+    try:
+        response = get_client().generate_completion(
+            prompt=prompt,
+            temperature=0.7,
+            max_tokens=300 * len(missing)
+        )
+    except Exception as e:
+        logger.error(f"Wrong-answer feedback request failed: {str(e)}")
+        return f"Could not fetch detailed feedback: {str(e)}"
+    explanations = {
+        item.get("id"): item.get("explanation")
+        for item in parse_json_array(extract_response_text(response)).items
+        if isinstance(item, dict)
+    }
+    cached = []
+    for i, answer in enumerate(missing):
+        explanation = explanations.get(i + 1)
+        if isinstance(explanation, str) and explanation:
+            answer["explanation"] = explanation
+            answer["tailored"] = True
+            cached.append((answer["question"], answer["user_answer"], explanation))
+    question_bank.save_feedback(cached)
+    if len(cached) < len(missing):
+        return f"Detailed feedback is unavailable for {len(missing) - len(cached)} of your incorrect answers."
+    return None
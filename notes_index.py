@@ -0,0 +1,140 @@
+import glob
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+# Upper bound on the notes pasted into a prompt, regardless of how large the notes grow
+MAX_CONTEXT_CHARS = int(os.environ.get("NOTES_CONTEXT_MAX_CHARS", "6000"))
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from how in into is it its of on or that the this to "
+    "use used uses using was what when which with you your".split()
+)
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+def chunk_text(text, words_per_chunk=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """
+    Split text into overlapping word windows.
+    """
+    words = text.split()
+    step = max(1, words_per_chunk - overlap)
+    return [" ".join(words[i:i + words_per_chunk]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+class NotesIndex:
+    """
+    BM25 inverted index over chunks of the scraped notes.
+    """
+
+    def __init__(self, chunks, postings, doc_lengths, version):
+        self.chunks = chunks
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.version = version
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, text, version):
+        chunks = [chunk for chunk in chunk_text(text) if chunk]
+        postings = {}
+        doc_lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([chunk_id, tf])
+        return cls(chunks, postings, doc_lengths, version)
+
+    def search(self, query, k=3):
+        """
+        Return the ids of the top-k chunks for `query`, best first.
+        """
+        n_docs = len(self.chunks)
+        if not n_docs:
+            return []
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = K1 * (1 - B + B * self.doc_lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return [chunk_id for chunk_id, _ in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+    def build_context(self, topics, k_per_topic=2, max_chars=MAX_CONTEXT_CHARS):
+        """
+        Collect the best chunks for each topic, in topic order, until `max_chars` is reached.
+        """
+        selected = []
+        seen = set()
+        size = 0
+        for topic in topics:
+            for chunk_id in self.search(topic, k_per_topic):
+                if chunk_id in seen:
+                    continue
+                chunk = self.chunks[chunk_id]
+                if size + len(chunk) > max_chars:
+                    return "\n\n".join(selected)
+                seen.add(chunk_id)
+                selected.append(chunk)
+                size += len(chunk) + 2
+        return "\n\n".join(selected)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.version,
+                "chunks": self.chunks,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["chunks"], data["postings"], data["doc_lengths"], data["version"])
+
+def load_or_build_index(snapshot):
+    """
+    Return the index for a notes snapshot, loading it from disk when it was already built
+    for the same snapshot version.
+    """
+    version = snapshot.get("version", "unknown")
+    path = data_path(f"notes_index_{version}.json")
+    if os.path.exists(path):
+        try:
+            return NotesIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable notes index {path}: {str(e)}")
+    index = NotesIndex.build(snapshot.get("text", ""), version)
+    try:
+        index.save(path)
+        # Drop indexes built for older snapshots
+        for stale_path in glob.glob(data_path("notes_index_*.json")):
+            if stale_path != path:
+                os.remove(stale_path)
+    except OSError as e:
+        logger.warning(f"Failed to persist notes index: {str(e)}")
+    logger.info(f"Built notes index {version} with {len(index.chunks)} chunks.")
+    return index
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+import requests
+
+import telemetry
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+GITHUB_NOTES_URL = "https://github.com/Furkan-Gulsen/aws-certified-cloud-practitioner-certification-my-notes"
+
+# Bump when the snapshot layout or preprocessing changes so old snapshots are refetched
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_PATH = os.environ.get("NOTES_SNAPSHOT_PATH") or data_path("notes_snapshot.json")
+NOTES_TTL_SECONDS = int(os.environ.get("NOTES_TTL_SECONDS", "86400"))
+REQUEST_TIMEOUT = 15
+
+def extract_notes(html):
+    # Only needed when the notes are actually re-scraped
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    content = soup.find('article', class_='markdown-body')
+    text = content.get_text(separator=' ') if content else ''
+    return text
+
+def preprocess_text(text):
+    text = re.sub(r'[#*_-]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """
+    Return the snapshot dict stored at `path`, or None if it is missing, unreadable or outdated.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+def _write_snapshot(snapshot, path):
+    # Write to a temporary file first so readers never see a half-written snapshot
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def load_notes(url=GITHUB_NOTES_URL, ttl=NOTES_TTL_SECONDS, path=SNAPSHOT_PATH):
+    """
+    Return the processed notes snapshot for `url`.
+
+    A snapshot younger than `ttl` seconds is used as-is. An older one is revalidated with a
+    conditional request (ETag / Last-Modified) and only re-scraped when the page changed.
+    If the network is unavailable, the last snapshot on disk is used regardless of age;
+    without one, the requests or OS error is raised so callers do not cache missing notes.
+    """
+    snapshot = read_snapshot(path)
+    if snapshot is not None and snapshot.get("url") != url:
+        snapshot = None
+    if snapshot is not None and time.time() - snapshot["fetched_at"] < ttl:
+        return snapshot
+
+    headers = {}
+    if snapshot is not None:
+        if snapshot.get("etag"):
+            headers["If-None-Match"] = snapshot["etag"]
+        if snapshot.get("last_modified"):
+            headers["If-Modified-Since"] = snapshot["last_modified"]
+    with telemetry.span("notes_scrape", sample_rate=1.0) as scrape:
+        try:
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304 and snapshot is not None:
+                logger.info("Notes unchanged since the last snapshot; extending its TTL.")
+                scrape["status"] = "not_modified"
+                snapshot["fetched_at"] = time.time()
+            else:
+                response.raise_for_status()
+                text = preprocess_text(extract_notes(response.text))
+                snapshot = {
+                    "format": SNAPSHOT_FORMAT,
+                    "url": url,
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "version": hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+                    "text": text
+                }
+                logger.info(f"Fetched notes snapshot {snapshot['version']} ({len(text)} characters).")
+                scrape.update(status="fetched", characters=len(text))
+            _write_snapshot(snapshot, path)
+        except (requests.RequestException, OSError) as e:
+            scrape["status"] = "failed"
+            if snapshot is None:
+                logger.error(f"Failed to fetch notes and no local snapshot is available: {str(e)}")
+                raise
+            logger.warning(f"Failed to refresh notes, using the local snapshot {snapshot['version']}: {str(e)}")
+    return snapshot
@@ -0,0 +1,266 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_PATH = os.environ.get("PROGRESS_DB_PATH") or data_path("progress.db")
+# Events are written in batches of up to BATCH_SIZE, at most FLUSH_INTERVAL seconds after they are recorded
+BATCH_SIZE = int(os.environ.get("PROGRESS_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", "0.5"))
+MAX_PENDING = int(os.environ.get("PROGRESS_MAX_PENDING", "100000"))
+
+# Quiz names recorded with each answer
+QUIZ_STATIC = "static_quiz"
+QUIZ_LLM = "llm_quiz"
+QUIZ_MOCK = "mock_test"
+# Daily aggregates file answers without a domain (LLM Quiz, Mock Test) under this one
+MIXED_DOMAIN = "Mixed"
+DAILY_COLUMNS = ("learner", "domain", "day", "answers", "correct", "timed", "seconds")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer_events (
+    id INTEGER PRIMARY KEY,
+    learner TEXT NOT NULL,
+    session_id TEXT,
+    quiz TEXT NOT NULL,
+    domain TEXT,
+    question TEXT NOT NULL,
+    user_answer TEXT,
+    correct INTEGER NOT NULL,
+    response_seconds REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answer_events_learner ON answer_events (learner, created_at);
+CREATE TABLE IF NOT EXISTS answer_daily (
+    learner TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    day TEXT NOT NULL,
+    answers INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    timed INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (learner, domain, day)
+);
+"""
+
+_INSERT = (
+    "INSERT INTO answer_events (learner, session_id, quiz, domain, question, user_answer, correct, response_seconds, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_UPSERT_DAILY = (
+    "INSERT INTO answer_daily (learner, domain, day, answers, correct, timed, seconds) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (learner, domain, day) DO UPDATE SET answers = answers + excluded.answers, "
+    "correct = correct + excluded.correct, timed = timed + excluded.timed, seconds = seconds + excluded.seconds"
+)
+
+# Rebuilds the aggregates of a database written before they existed; days are local dates, as in _daily_rollup
+_BACKFILL_DAILY = (
+    "INSERT INTO answer_daily (learner, domain, day, answers, correct, timed, seconds) "
+    f"SELECT learner, COALESCE(domain, '{MIXED_DOMAIN}'), date(created_at, 'unixepoch', 'localtime'), "
+    "COUNT(*), SUM(correct), COUNT(response_seconds), COALESCE(SUM(response_seconds), 0) "
+    "FROM answer_events GROUP BY 1, 2, 3"
+)
+
+_STOP = object()
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _daily_rollup(events):
+    """
+    Sum a batch of answer events per (learner, domain, local day), as answer_daily upsert rows.
+    """
+    totals = {}
+    for learner, _, _, domain, _, _, correct, response_seconds, created_at in events:
+        key = (learner, domain or MIXED_DOMAIN, time.strftime("%Y-%m-%d", time.localtime(created_at)))
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = [0, 0, 0, 0.0]
+        total[0] += 1
+        total[1] += correct
+        if response_seconds is not None:
+            total[2] += 1
+            total[3] += response_seconds
+    return [key + tuple(total) for key, total in totals.items()]
+
+class ProgressStore:
+    """
+    Durable log of answer events.
+
+    record() only puts the event on an in-memory queue and never touches disk, so a click
+    does not wait on SQLite. A single writer thread drains the queue and commits events in
+    batches; if the queue is full (the disk cannot keep up), new events are dropped and counted.
+    Each batch also updates the per-learner, per-domain daily totals in answer_daily in the
+    same transaction, so analytics never have to rescan the raw events.
+    """
+
+    def __init__(self, path=PROGRESS_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        # record() runs on many session threads, so the counters are only updated under the lock
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._local = threading.local()
+        # Create the schema before the first read can happen
+        conn = _connect(path)
+        with conn:
+            if conn.execute("SELECT 1 FROM answer_daily LIMIT 1").fetchone() is None:
+                conn.execute(_BACKFILL_DAILY)
+        conn.close()
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, learner, quiz, question, user_answer, correct, domain=None, response_seconds=None, session_id=None):
+        event = (
+            learner, session_id, quiz, domain, question,
+            None if user_answer is None else str(user_answer),
+            1 if correct else 0, response_seconds, time.time()
+        )
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            logger.warning(f"Progress queue full; dropped answer event ({dropped} dropped so far).")
+
+    def flush(self, timeout=10):
+        """
+        Block until every event recorded so far is committed. Returns False on timeout.
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        conn = _connect(self.path)
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            # Drain whatever else is already queued, up to one batch
+            items = [] if item is None else [item]
+            while item is not None and len(pending) + len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = []
+            stop = False
+            for entry in items:
+                if entry is _STOP:
+                    stop = True
+                elif isinstance(entry, threading.Event):
+                    waiters.append(entry)
+                else:
+                    pending.append(entry)
+            if pending and deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if pending and (item is None or waiters or stop or len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(conn, pending)
+                pending = []
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                conn.close()
+                return
+
+    def _write(self, conn, events):
+        try:
+            with conn:
+                conn.executemany(_INSERT, events)
+                conn.executemany(_UPSERT_DAILY, _daily_rollup(events))
+            with self._lock:
+                self.written += len(events)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.dropped += len(events)
+            logger.error(f"Failed to write {len(events)} answer events: {str(e)}")
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def answer_history(self, learner, limit=100):
+        """
+        Most recent committed answer events of `learner`, newest first.
+        """
+        rows = self._reader().execute(
+            "SELECT quiz, domain, question, user_answer, correct, response_seconds, created_at "
+            "FROM answer_events WHERE learner = ? ORDER BY created_at DESC LIMIT ?",
+            (learner, limit)
+        ).fetchall()
+        keys = ("quiz", "domain", "question", "user_answer", "correct", "response_seconds", "created_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def answers(self, quiz):
+        """
+        (learner, question, correct) of every committed answer event of `quiz`, oldest first.
+        """
+        return self._reader().execute(
+            "SELECT learner, question, correct FROM answer_events WHERE quiz = ? ORDER BY created_at",
+            (quiz,)
+        ).fetchall()
+
+    def daily_stats(self, learner=None):
+        """
+        Daily totals (DAILY_COLUMNS) of one learner, or of every learner when `learner` is None.
+        """
+        query = f"SELECT {', '.join(DAILY_COLUMNS)} FROM answer_daily"
+        if learner is None:
+            return self._reader().execute(query).fetchall()
+        return self._reader().execute(f"{query} WHERE learner = ?", (learner,)).fetchall()
+
+    def domain_totals(self):
+        """
+        All-time (learner, domain, answers, correct, timed, seconds) totals of every learner.
+        """
+        return self._reader().execute(
+            "SELECT learner, domain, SUM(answers), SUM(correct), SUM(timed), SUM(seconds) "
+            "FROM answer_daily GROUP BY learner, domain"
+        ).fetchall()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_progress_store():
+    """
+    Return the process-wide progress store, starting its writer thread on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProgressStore()
+        return _store
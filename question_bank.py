@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from config import data_path
+from dedup import QuestionDeduplicator, signature
+
+logger = logging.getLogger(__name__)
+
+# Question sources: LLM Quiz (main.py) and Mock Test (app.py)
+SOURCE_CAF_WAF = "caf_waf"
+SOURCE_MOCK_TEST = "clf_mock"
+
+BANK_PATH = os.environ.get("QUESTION_BANK_PATH") or data_path("question_bank.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    explanation TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    times_served INTEGER NOT NULL DEFAULT 0,
+    minhash BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_questions_source_served ON questions (source, times_served);
+CREATE TABLE IF NOT EXISTS feedback (
+    fingerprint TEXT NOT NULL,
+    user_answer TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (fingerprint, user_answer)
+);
+"""
+
+_local = threading.local()
+_dedup_lock = threading.Lock()
+_deduplicators = {}
+_add_lock = threading.Lock()
+
+def _connect():
+    """
+    Return this thread's connection to the bank, creating the schema on first use.
+    Streamlit runs each session in its own thread, so connections are not shared.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(BANK_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+        if "minhash" not in columns:
+            # Banks created before near-duplicate detection
+            conn.execute("ALTER TABLE questions ADD COLUMN minhash BLOB")
+        _local.conn = conn
+    return conn
+
+def _fingerprint(question_text):
+    normalized = " ".join(question_text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+def _normalize(question):
+    """
+    Return (question, options, answer, explanation) for a valid question dict, else None.
+    Accepts both the LLM Quiz schema ("answer") and the Mock Test schema ("correct_answer").
+    """
+    if not isinstance(question, dict):
+        return None
+    answer = question.get("answer", question.get("correct_answer"))
+    options = question.get("options")
+    text = question.get("question")
+    if not isinstance(text, str) or not text.strip():
+        return None
+    if not isinstance(options, list) or len(options) != 4 or answer not in options:
+        return None
+    return text.strip(), options, answer, str(question.get("explanation", ""))
+
+def get_deduplicator(source):
+    """
+    Return the process-wide near-duplicate index for a source, loading stored signatures on first use.
+    """
+    with _dedup_lock:
+        deduplicator = _deduplicators.get(source)
+        if deduplicator is not None:
+            return deduplicator
+        deduplicator = QuestionDeduplicator()
+        backfill = []
+        try:
+            conn = _connect()
+            rows = conn.execute(
+                "SELECT fingerprint, question, options, minhash FROM questions WHERE source = ?",
+                (source,)
+            ).fetchall()
+            for fingerprint, text, options, minhash in rows:
+                question = {"question": text, "options": json.loads(options)}
+                if minhash is None:
+                    sig = signature(question)
+                    backfill.append((sig.tobytes(), fingerprint))
+                else:
+                    sig = np.frombuffer(minhash, dtype=np.uint32)
+                deduplicator.add(fingerprint, question, sig)
+            if backfill:
+                with conn:
+                    conn.executemany("UPDATE questions SET minhash = ? WHERE fingerprint = ?", backfill)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load question signatures: {str(e)}")
+        _deduplicators[source] = deduplicator
+        return deduplicator
+
+def _add(questions, source, served):
+    # Near-duplicates are checked against the shared index first, but questions are only indexed once
+    # their insert has committed; the lock keeps a concurrent batch from slipping in between
+    deduplicator = get_deduplicator(source)
+    batch = QuestionDeduplicator()
+    fresh = []
+    entries = []
+    rows = []
+    skipped = 0
+    now = time.time()
+    with _add_lock:
+        for question in questions:
+            normalized = _normalize(question)
+            if normalized is None:
+                skipped += 1
+                continue
+            text, options, answer, explanation = normalized
+            fingerprint = _fingerprint(text)
+            candidate = {"question": text, "options": options}
+            sig = signature(candidate)
+            if deduplicator.find_duplicate(candidate, sig) is not None or not batch.check_and_add(fingerprint, candidate, sig):
+                skipped += 1
+                continue
+            fresh.append(question)
+            entries.append((fingerprint, candidate, sig))
+            rows.append((fingerprint, source, text, json.dumps(options), answer, explanation, now, int(served), sig.tobytes()))
+        if not rows:
+            return [], 0
+        try:
+            conn = _connect()
+            with conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO questions "
+                    "(fingerprint, source, question, options, answer, explanation, created_at, times_served, minhash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                added = conn.total_changes - before
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write questions to the bank: {str(e)}")
+            return fresh, 0
+        for fingerprint, candidate, sig in entries:
+            deduplicator.add(fingerprint, candidate, sig)
+    logger.info(f"Stored {added} new {source} questions in the bank ({skipped + len(rows) - added} invalid or duplicate).")
+    return fresh, added
+
+def add_questions(questions, source, served=False):
+    """
+    Store validated questions in the bank. Invalid items and near-duplicates of questions
+    already in the bank are skipped. Returns the number of new questions stored.
+    Pass served=True for questions that are being shown to a session right away.
+    """
+    return _add(questions, source, served)[1]
+
+def add_new_questions(questions, source, served=False):
+    """
+    Like add_questions, but return the questions that passed validation and near-duplicate
+    detection against the bank, so only those are shown. They are returned even if the write fails.
+    """
+    return _add(questions, source, served)[0]
+
+def count_questions(source, unserved_only=False):
+    """
+    Return how many questions the bank holds for a source.
+    """
+    query = "SELECT COUNT(*) FROM questions WHERE source = ?"
+    if unserved_only:
+        query += " AND times_served = 0"
+    try:
+        return _connect().execute(query, (source,)).fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"Failed to count questions in the bank: {str(e)}")
+        return 0
+
+def draw_questions(source, count):
+    """
+    Return up to `count` questions for a quiz session, preferring the least-served ones,
+    and mark them as served. Questions use the LLM Quiz schema (question, options, answer, explanation).
+    """
+    try:
+        conn = _connect()
+        # Walk the (source, times_served) index for a small candidate window, then shuffle in Python
+        candidates = conn.execute(
+            "SELECT id, question, options, answer, explanation FROM questions "
+            "WHERE source = ? ORDER BY times_served LIMIT ?",
+            (source, count * 3)
+        ).fetchall()
+        chosen = random.sample(candidates, min(count, len(candidates)))
+        with conn:
+            conn.executemany(
+                "UPDATE questions SET times_served = times_served + 1 WHERE id = ?",
+                [(row[0],) for row in chosen]
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read questions from the bank: {str(e)}")
+        return []
+    return [
+        {
+            "question": question,
+            "options": json.loads(options),
+            "answer": answer,
+            "explanation": explanation
+        }
+        for _, question, options, answer, explanation in chosen
+    ]
+
+def get_feedback(question_text, user_answer):
+    """
+    Return the cached explanation for a wrong answer to a question, or None.
+    """
+    try:
+        row = _connect().execute(
+            "SELECT explanation FROM feedback WHERE fingerprint = ? AND user_answer = ?",
+            (_fingerprint(question_text), user_answer)
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read feedback from the bank: {str(e)}")
+        return None
+    return row[0] if row else None
+
+def save_feedback(items):
+    """
+    Cache explanations for wrong answers. `items` is a list of (question_text, user_answer, explanation).
+    """
+    now = time.time()
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO feedback (fingerprint, user_answer, explanation, created_at) VALUES (?, ?, ?, ?)",
+                [(_fingerprint(question), answer, explanation, now) for question, answer, explanation in items]
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to write feedback to the bank: {str(e)}")
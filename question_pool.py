@@ -0,0 +1,93 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import question_bank
+
+logger = logging.getLogger(__name__)
+
+LOW_WATERMARK = int(os.environ.get("QUESTION_POOL_LOW_WATERMARK", "30"))
+HIGH_WATERMARK = int(os.environ.get("QUESTION_POOL_HIGH_WATERMARK", "80"))
+MAX_CONCURRENCY = int(os.environ.get("QUESTION_POOL_MAX_CONCURRENCY", "2"))
+POLL_INTERVAL = float(os.environ.get("QUESTION_POOL_POLL_INTERVAL", "10"))
+MAX_BACKOFF = 300.0
+
+class QuestionPoolWorker:
+    """
+    Background producer that keeps a warm pool of unserved questions in the question bank.
+
+    When the number of unserved questions for `source` drops below `low_watermark`, the worker
+    calls `generate` (up to `max_concurrency` calls at a time) until the pool reaches
+    `high_watermark`. `generate` must store its questions in the bank, as
+    generate_llm_questions does.
+    """
+
+    def __init__(self, generate, source, low_watermark=LOW_WATERMARK, high_watermark=HIGH_WATERMARK,
+                 max_concurrency=MAX_CONCURRENCY, poll_interval=POLL_INTERVAL):
+        if low_watermark > high_watermark:
+            raise ValueError("low_watermark must not exceed high_watermark")
+        self.generate = generate
+        self.source = source
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.max_concurrency = max(1, max_concurrency)
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"question-pool-{self.source}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """
+        Wake the worker early, e.g. right after a quiz drew questions from the pool.
+        """
+        self._wake.set()
+
+    def unserved(self):
+        return question_bank.count_questions(self.source, unserved_only=True)
+
+    def _run(self):
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            delay = self.poll_interval
+            if self.unserved() < self.low_watermark:
+                if self._refill():
+                    backoff = self.poll_interval
+                else:
+                    # Generation produced nothing new; back off instead of hammering the provider
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    delay = backoff
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _refill(self):
+        """
+        Generate until the pool reaches the high watermark. Returns False if no progress was made.
+        """
+        progressed = False
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while not self._stop.is_set():
+                before = self.unserved()
+                if before >= self.high_watermark:
+                    break
+                logger.info(f"Question pool for {self.source} at {before}/{self.high_watermark}; generating more.")
+                futures = [executor.submit(self.generate) for _ in range(self.max_concurrency)]
+                wait(futures)
+                for future in futures:
+                    if future.exception() is not None:
+                        logger.error(f"Question pool generation failed: {str(future.exception())}")
+                if self.unserved() <= before:
+                    break
+                progressed = True
+        return progressed
@@ -0,0 +1,64 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class QuestionStream:
+    """
+    Collect quiz questions from a generator on a background thread.
+
+    `questions` is a plain list that grows as the generator yields, so it can be stored in
+    session state and rendered while generation continues. Use wait_for() to block only
+    until the question about to be shown exists.
+    """
+
+    def __init__(self, generate=None, expected=0, questions=None):
+        self.questions = list(questions or [])
+        self.expected = expected or len(self.questions)
+        self.error = None
+        self._done = threading.Event()
+        self._changed = threading.Condition()
+        if generate is None:
+            self._done.set()
+        else:
+            threading.Thread(target=self._run, args=(generate,), name="question-stream", daemon=True).start()
+
+    @classmethod
+    def from_list(cls, questions):
+        return cls(questions=questions)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def total(self):
+        """
+        Number of questions the quiz will have: the expected count while streaming,
+        the actual count once the generator has finished.
+        """
+        if self.done:
+            return len(self.questions)
+        return max(self.expected, len(self.questions))
+
+    def wait_for(self, count, timeout=120):
+        """
+        Block until at least `count` questions are available or the stream ends.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.questions) >= count or self.done, timeout=timeout)
+        return len(self.questions) >= count
+
+    def _run(self, generate):
+        try:
+            for question in generate():
+                with self._changed:
+                    self.questions.append(question)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+            logger.error(f"Question stream failed: {str(e)}")
+        finally:
+            with self._changed:
+                self._done.set()
+                self._changed.notify_all()
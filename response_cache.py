@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+# LLM_CACHE_BACKEND: "sqlite" (default), "memory" or "off"
+CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "sqlite")
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH") or data_path("llm_cache.db")
+CACHE_MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024)
+CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1000"))
+CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+def cache_key(model, prompt, temperature, max_tokens):
+    """
+    Content address of a completion request.
+    """
+    payload = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryBackend:
+    """
+    In-process LRU backend bounded by entry count.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, max_age):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if time.time() - created_at > max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class SqliteBackend:
+    """
+    On-disk backend shared by every process on the node, bounded by total size.
+    The total is kept in the database next to the entries, so every process sees the same size.
+    Least recently accessed entries are evicted first; expired entries are purged on eviction.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            );
+            -- Caches created before the total was stored start from the entries they hold
+            INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+            """)
+            self._local.conn = conn
+        return conn
+
+    def size(self):
+        """
+        Total size of the cached values in bytes, across all processes.
+        """
+        return self._connect().execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def get(self, key, max_age):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM responses WHERE key = ? AND created_at > ?",
+            (key, now - max_age)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with conn:
+            # Take the write lock first, so the replaced size and the total cannot change under us
+            conn.execute("BEGIN IMMEDIATE")
+            replaced = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            conn.execute(
+                "UPDATE cache_size SET bytes = bytes + ? WHERE id = 0",
+                (size - (replaced[0] if replaced else 0),)
+            )
+            total = conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        if total > self.max_bytes:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Drop expired entries, then least recently accessed ones until we are under 90% of the limit
+        target = int(self.max_bytes * 0.9)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - CACHE_TTL_SECONDS,))
+            # Recount from the entries themselves, in case another process already evicted
+            size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall() if size > target else []
+            evicted = []
+            for key, entry_size in rows:
+                if size <= target:
+                    break
+                evicted.append((key,))
+                size -= entry_size
+            conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            conn.execute("UPDATE cache_size SET bytes = ? WHERE id = 0", (size,))
+        logger.info(f"Evicted {len(evicted)} LLM cache entries; cache is now {size} bytes.")
+
+class ResponseCache:
+    """
+    Content-addressed cache of LLM completions with TTL and hit/miss counters.
+    Values are stored as JSON, so any JSON-serializable response can be cached.
+    """
+
+    def __init__(self, backend, ttl=CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        # Every session thread reads and writes through the same cache
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key, self.ttl)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.errors += 1
+            logger.error(f"LLM cache read failed: {str(e)}")
+            value = None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, response):
+        try:
+            self.backend.set(key, json.dumps(response))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            with self._lock:
+                self.errors += 1
+            logger.error(f"LLM cache write failed: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            hits, misses, errors = self.hits, self.misses, self.errors
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "errors": errors,
+            "hit_rate": (hits / lookups) if lookups else 0.0
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the process-wide response cache configured by LLM_CACHE_BACKEND, or None when disabled.
+    """
+    global _cache
+    if CACHE_BACKEND == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            backend = MemoryBackend() if CACHE_BACKEND == "memory" else SqliteBackend()
+            _cache = ResponseCache(backend)
+        return _cache
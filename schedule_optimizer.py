@@ -0,0 +1,233 @@
+import csv
+import importlib.util
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+from llm_parsing import extract_response_text, parse_json_array
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_COLUMNS = ["Date", "Day", "Study Hours", "Video Segment", "Topics", "Hands-On/Labs", "Tips & Tricks", "Status"]
+REVISED_COLUMNS = ["Date", "Day", "Revised Study Hours", "Tasks", "Tips"]
+# Columns the optimizer reads; everything else in an uploaded workbook is skipped
+LOAD_COLUMNS = ["Date", "Day", "Study Hours", "Video Segment", "Topics", "Hands-On/Labs", "Tips & Tricks"]
+TEXT_COLUMNS = ["Study Hours", "Video Segment", "Topics", "Hands-On/Labs", "Tips & Tricks"]
+
+# python-calamine parses workbooks natively, roughly 10x faster than openpyxl
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+MAX_SESSION_HOURS = 4.0
+BLOCK_HOURS = 2.0
+BREAK_MINUTES = 15
+REVIEW_MINUTES = 30
+
+# LLM study tips are requested per window of days, several windows at a time
+WINDOW_DAYS = 7
+WINDOW_CONCURRENCY = int(os.environ.get("SCHEDULE_TIPS_CONCURRENCY", "4"))
+WINDOW_RETRIES = 2
+TIP_TOKENS_PER_DAY = 60
+SUMMARY_MAX_CHARS = 400
+
+def read_schedule_csv(text):
+    """
+    Read a schedule CSV whose free-text cells may contain unquoted commas.
+    Rows with surplus fields have the extras merged into Topics; short rows are padded.
+    """
+    rows = [row for row in csv.reader(StringIO(text.strip())) if row]
+    header, data = rows[0], rows[1:]
+    width = len(header)
+    topics_at = header.index("Topics") if "Topics" in header else width - 1
+    fixed = []
+    for row in data:
+        if len(row) > width:
+            extra = len(row) - width
+            merged = ", ".join(field.strip() for field in row[topics_at:topics_at + extra + 1])
+            row = row[:topics_at] + [merged] + row[topics_at + extra + 1:]
+        fixed.append(row + [""] * (width - len(row)))
+    return _compact_schedule(pd.DataFrame(fixed, columns=header).replace("", np.nan))
+
+def read_schedule_excel(data):
+    """
+    Read an uploaded schedule workbook (raw bytes), materializing only LOAD_COLUMNS.
+    """
+    with telemetry.span("excel_load", engine=EXCEL_ENGINE, bytes=len(data)) as attributes:
+        df = pd.read_excel(
+            BytesIO(data),
+            engine=EXCEL_ENGINE,
+            usecols=lambda column: str(column).strip() in LOAD_COLUMNS
+        )
+        df.columns = [str(column).strip() for column in df.columns]
+        attributes["rows"] = len(df)
+        return _compact_schedule(df)
+
+def _compact_schedule(df):
+    """
+    Keep LOAD_COLUMNS with compact dtypes: ISO date strings, a categorical Day and string text.
+    """
+    df = df.reindex(columns=LOAD_COLUMNS)
+    dates = pd.to_datetime(df["Date"], errors="coerce", format="mixed")
+    return df.assign(
+        Date=dates.dt.strftime("%Y-%m-%d").fillna(df["Date"].astype("string")).astype("string"),
+        Day=df["Day"].astype("string").str.strip().astype("category"),
+        **{column: df[column].astype("string") for column in TEXT_COLUMNS}
+    )
+
+def parse_study_hours(values):
+    """
+    Parse the Study Hours column into planned hours per day.
+    Cells look like "5:2:06:32-3:12:40" (5 hours, then the video segment) or "3:—"; plain numbers
+    are taken as hours, and cells without a leading hour count ("—") become 0.
+    """
+    text = values.astype("string").str.strip()
+    hours = pd.to_numeric(text.str.extract(r"^(\d+(?:\.\d+)?)\s*(?::|$)", expand=False), errors="coerce")
+    return hours.fillna(0.0).astype(float)
+
+def _carry_forward(overflow, spare, segment):
+    """
+    Move hours that exceed the session cap into later days with spare capacity, never past
+    the end of `segment` (an exam). Backlog follows the Lindley recursion
+    B[i] = max(0, B[i-1] + overflow[i-1] - spare[i]), computed per segment with cumulative sums.
+    """
+    incoming = overflow.groupby(segment).shift(fill_value=0.0)
+    net = incoming - spare
+    walk = net.groupby(segment).cumsum()
+    backlog = walk - walk.groupby(segment).cummin().clip(upper=0)
+    previous_backlog = backlog.groupby(segment).shift(fill_value=0.0)
+    absorbed = previous_backlog + incoming - backlog
+    return absorbed, backlog
+
+def _clean_text(column):
+    return column.fillna("").astype(str).str.strip().str.rstrip(".")
+
+def _join_text(*columns):
+    joined = _clean_text(columns[0])
+    for column in columns[1:]:
+        joined = joined + ", " + _clean_text(column)
+    return joined.str.strip(", ")
+
+def _format_hours(hours):
+    return hours.round(2).astype(str).str.replace(r"\.0$", "", regex=True)
+
+def optimize_schedule(df, max_session_hours=MAX_SESSION_HOURS):
+    """
+    Build a revised schedule locally: cap each day's study time, carry the excess into lighter
+    days before the next exam, split study into blocks with breaks, and add a review of the
+    previous day's topics. Returns a DataFrame with REVISED_COLUMNS.
+    """
+    df = df.reindex(columns=SCHEDULE_COLUMNS).reset_index(drop=True)
+    topics = _join_text(df["Video Segment"], df["Topics"])
+    is_exam = topics.str.contains("EXAM DAY", case=False, regex=False)
+
+    hours = parse_study_hours(df["Study Hours"]).where(~is_exam, 0.0)
+    capped = hours.clip(upper=max_session_hours)
+    overflow = hours - capped
+    spare = (max_session_hours - capped).where(~is_exam, 0.0)
+    # Each exam day closes a segment; excess study never moves past an exam
+    segment = is_exam.astype(int).cumsum().shift(fill_value=0)
+    absorbed, backlog = _carry_forward(overflow, spare, segment)
+    study = capped + absorbed
+
+    previous_topics = topics.shift().where(~is_exam.shift(fill_value=False), "").fillna("")
+    has_review = (previous_topics != "") & (study > 0)
+    breaks = np.maximum(np.ceil(study / BLOCK_HOURS) - 1, 0).astype(int)
+
+    revised_hours = (
+        _format_hours(study) + " h study"
+        + np.where(breaks > 0, " in " + (breaks + 1).astype(str) + " blocks + " + breaks.astype(str) + f" x {BREAK_MINUTES} min break", "")
+        + np.where(has_review, f" + {REVIEW_MINUTES} min review", "")
+    ).where(~is_exam, "Exam day: light recall only")
+
+    labs = _clean_text(df["Hands-On/Labs"])
+    tasks = (
+        np.where(has_review, f"Review ({REVIEW_MINUTES} min): " + previous_topics + ". ", "")
+        + np.where(topics != "", np.where(is_exam, "Exam: ", "Study: ") + topics + ". ", "")
+        + np.where(labs != "", "Lab: " + labs + ". ", "")
+        + np.where(absorbed > 0, "Catch-up: " + _format_hours(absorbed) + " h carried over from longer days. ", "")
+    )
+    # Material that never fitted before an exam is flagged on the segment's last day that is not the exam itself
+    last_in_segment = (~segment[~is_exam].duplicated(keep="last")).reindex(df.index, fill_value=False)
+    leftover = backlog + overflow
+    tasks = tasks + np.where(last_in_segment & (leftover > 0), "Note: " + _format_hours(leftover) + " h of planned material did not fit; prioritise weak areas. ", "")
+
+    return pd.DataFrame({
+        "Date": df["Date"],
+        "Day": df["Day"],
+        "Revised Study Hours": revised_hours,
+        "Tasks": pd.Series(tasks, index=df.index).str.strip(),
+        "Tips": df["Tips & Tricks"].fillna("").astype(str).str.strip()
+    }, columns=REVISED_COLUMNS)
+
+def _window_summary(window):
+    """
+    Short carry-over note from the end of a window, given to the next window's prompt.
+    """
+    last = window.tail(2)
+    summary = " ".join(f"{date}: {tasks}" for date, tasks in zip(last["Date"], last["Tasks"]))
+    return summary[:SUMMARY_MAX_CHARS]
+
+def _request_window_tips(window, summary, client):
+    """
+    Ask for one tip per day of `window`. Retries the window on its own when the call fails
+    or returns nothing usable; returns {date: tip}, empty if every attempt failed.
+    """
+    dates = set(window["Date"].astype(str))
+    carry_over = f"\n    ### Previous days (for continuity):\n    {summary}\n" if summary else ""
+    prompt = f"""
+    You are an Exam Help Buddy. Below is part of a revised daily study schedule for AWS certification exams. For each date, write one short, practical study tip (one sentence) that fits that day's tasks.
+    {carry_over}
+    ### Revised Schedule:
+    {window[["Date", "Tasks"]].to_csv(index=False)}
+
+    ### Format:
+    [
+        {{"date": "YYYY-MM-DD", "tip": "One-sentence tip"}},
+        ...
+    ]
+    """
+    for attempt in range(WINDOW_RETRIES + 1):
+        try:
+            response = client.generate_completion(
+                prompt=prompt,
+                temperature=0.7,
+                max_tokens=TIP_TOKENS_PER_DAY * len(window) + 100,
+                # A retry after a bad answer must not be served the same cached response
+                use_cache=attempt == 0
+            )
+        except Exception as e:
+            logger.warning(f"Study tips for {min(dates)}..{max(dates)} failed (attempt {attempt + 1}): {str(e)}")
+            continue
+        tips = {
+            str(item.get("date")): item.get("tip")
+            for item in parse_json_array(extract_response_text(response)).items
+            if isinstance(item, dict) and isinstance(item.get("tip"), str) and str(item.get("date")) in dates
+        }
+        if tips:
+            return tips
+        logger.warning(f"No usable study tips for {min(dates)}..{max(dates)} (attempt {attempt + 1}).")
+    return {}
+
+def add_llm_tips(revised, client, window_days=WINDOW_DAYS):
+    """
+    Optionally ask the LLM for one short prose tip per day and append it to the Tips column.
+    The schedule is split into week-sized windows that are requested concurrently, so latency
+    stays roughly flat as the schedule grows; days whose window failed keep their original tips.
+    """
+    if revised.empty:
+        return revised
+    windows = [revised.iloc[start:start + window_days] for start in range(0, len(revised), window_days)]
+    summaries = [""] + [_window_summary(window) for window in windows[:-1]]
+    tips = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(len(windows), WINDOW_CONCURRENCY))) as executor:
+        for window_tips in executor.map(lambda args: _request_window_tips(*args, client), zip(windows, summaries)):
+            tips.update(window_tips)
+    logger.info(f"Fetched study tips for {len(tips)}/{len(revised)} days in {len(windows)} windows.")
+    extra = revised["Date"].astype(str).map(tips).fillna("")
+    revised = revised.copy()
+    revised["Tips"] = (revised["Tips"] + " " + extra).str.strip()
+    return revised
@@ -0,0 +1,172 @@
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+FLASHCARDS_PATH = os.environ.get("FLASHCARDS_DB_PATH") or data_path("flashcards.db")
+
+# Review grades, as shown on the Flashcards page
+AGAIN, HARD, GOOD, EASY = "Again", "Hard", "Good", "Easy"
+GRADES = (AGAIN, HARD, GOOD, EASY)
+
+DAY_SECONDS = 24 * 3600
+# SM-2 parameters; a lapsed card comes back after RELEARN_SECONDS
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_SECONDS = 60
+FIRST_INTERVAL_DAYS = 1.0
+SECOND_INTERVAL_DAYS = 6.0
+HARD_FACTOR = 1.2
+EASY_BONUS = 1.3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS card_state (
+    learner TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    due REAL NOT NULL,
+    interval_days REAL NOT NULL,
+    ease REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    reviewed_at REAL NOT NULL,
+    PRIMARY KEY (learner, card_id)
+);
+"""
+
+_local = threading.local()
+
+def _connect():
+    """
+    Return this thread's connection to the flashcard state database.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(FLASHCARDS_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+class CardState:
+    __slots__ = ("due", "interval_days", "ease", "reps", "lapses")
+
+    def __init__(self, due=0.0, interval_days=0.0, ease=INITIAL_EASE, reps=0, lapses=0):
+        self.due = due
+        self.interval_days = interval_days
+        self.ease = ease
+        self.reps = reps
+        self.lapses = lapses
+
+def review(state, grade, now):
+    """
+    Apply one SM-2 review to `state` in place: Again resets the card for relearning, Hard grows
+    the interval slowly, Good by the ease factor, and Easy by the ease factor plus a bonus.
+    """
+    if grade == AGAIN:
+        state.ease = max(MIN_EASE, state.ease - 0.2)
+        state.reps = 0
+        state.lapses += 1
+        state.interval_days = 0.0
+        state.due = now + RELEARN_SECONDS
+        return state
+    if grade == HARD:
+        state.ease = max(MIN_EASE, state.ease - 0.15)
+        interval = max(FIRST_INTERVAL_DAYS, state.interval_days * HARD_FACTOR)
+    elif state.reps == 0:
+        interval = FIRST_INTERVAL_DAYS
+    elif state.reps == 1:
+        interval = SECOND_INTERVAL_DAYS
+    else:
+        interval = state.interval_days * state.ease
+    if grade == EASY:
+        state.ease += 0.15
+        interval *= EASY_BONUS
+    state.reps += 1
+    state.interval_days = interval
+    state.due = now + interval * DAY_SECONDS
+    return state
+
+class FlashcardScheduler:
+    """
+    Per-learner spaced-repetition queue over a deck of card ids.
+
+    Cards sit in a min-heap keyed by due time, with unseen cards due immediately in deck order.
+    next_card() and grade() are O(log n); superseded heap entries are skipped lazily.
+    Every grade is written through to SQLite, so the queue survives restarts.
+    """
+
+    def __init__(self, learner, card_ids):
+        self.learner = learner
+        self._states = {}
+        self._lock = threading.Lock()
+        saved = {
+            card_id: CardState(due, interval_days, ease, reps, lapses)
+            for card_id, due, interval_days, ease, reps, lapses in _connect().execute(
+                "SELECT card_id, due, interval_days, ease, reps, lapses FROM card_state WHERE learner = ?",
+                (learner,)
+            )
+        }
+        self._heap = []
+        for order, card_id in enumerate(card_ids):
+            state = saved.get(card_id) or CardState()
+            self._states[card_id] = state
+            self._heap.append((state.due, order, card_id))
+        heapq.heapify(self._heap)
+        self._order = {card_id: order for order, card_id in enumerate(card_ids)}
+
+    def __len__(self):
+        return len(self._states)
+
+    def _top(self):
+        # Drop entries left behind by earlier grades of the same card
+        while self._heap:
+            due, _, card_id = self._heap[0]
+            if self._states[card_id].due == due:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def next_card(self):
+        """
+        Return (card_id, due) for the card due soonest, or None for an empty deck.
+        `due` may lie in the future when nothing is due yet.
+        """
+        with self._lock:
+            top = self._top()
+            return (top[2], top[0]) if top else None
+
+    def grade(self, card_id, grade, now=None):
+        """
+        Record a review of `card_id` and reschedule it. Returns the new due time.
+        """
+        if grade not in GRADES:
+            raise ValueError(f"Unknown grade: {grade}")
+        now = time.time() if now is None else now
+        with self._lock:
+            state = review(self._states[card_id], grade, now)
+            heapq.heappush(self._heap, (state.due, self._order[card_id], card_id))
+        conn = _connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO card_state (learner, card_id, due, interval_days, ease, reps, lapses, reviewed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.learner, card_id, state.due, state.interval_days, state.ease, state.reps, state.lapses, now)
+            )
+        return state.due
+
+    def counts(self, now=None):
+        """
+        Return (due, new) card counts.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = sum(1 for state in self._states.values() if state.due <= now)
+            new = sum(1 for state in self._states.values() if state.reps == 0 and state.lapses == 0)
+        return due, new
@@ -0,0 +1,224 @@
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from config import data_path
+
+logger = logging.getLogger(__name__)
+
+# TELEMETRY_BACKEND: "jsonl" (default) writes sampled span events to a rotating JSONL file; "off" disables it.
+# Counters and histograms are always kept in memory and served on TELEMETRY_PORT when it is set.
+TELEMETRY_BACKEND = os.environ.get("TELEMETRY_BACKEND", "jsonl")
+TELEMETRY_PATH = os.environ.get("TELEMETRY_PATH") or data_path("telemetry.jsonl")
+TELEMETRY_MAX_BYTES = int(float(os.environ.get("TELEMETRY_MAX_MB", "10")) * 1024 * 1024)
+TELEMETRY_BACKUPS = int(os.environ.get("TELEMETRY_BACKUPS", "3"))
+# Fraction of span events written to the JSONL file; LLM calls are always written
+SAMPLE_RATE = float(os.environ.get("TELEMETRY_SAMPLE_RATE", "0.1"))
+TELEMETRY_PORT = os.environ.get("TELEMETRY_PORT")
+
+METRIC_PREFIX = "exam_buddy"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+# USD per million tokens (input, output); Gemini uses the 2.5 Pro list price for prompts up to 200k tokens
+MODEL_PRICES = {
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gemini-2.5-pro-exp-03-25": (1.25, 10.0),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+def _key(metric, labels):
+    return metric, tuple(sorted(labels.items()))
+
+def increment(metric, value=1, **labels):
+    key = _key(metric, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(metric, value, **labels):
+    key = _key(metric, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+        counts = histogram[0]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                counts[i] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return (len(text) + 3) // 4 if text else 0
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+_event_logger = None
+_event_logger_lock = threading.Lock()
+
+def _events():
+    """
+    Logger that hands events to a background thread writing the rotating JSONL file,
+    so recording an event never waits on disk.
+    """
+    global _event_logger
+    with _event_logger_lock:
+        if _event_logger is None:
+            event_logger = logging.getLogger("exam_buddy.telemetry.events")
+            event_logger.propagate = False
+            event_logger.setLevel(logging.INFO)
+            events = queue.SimpleQueue()
+            file_handler = logging.handlers.RotatingFileHandler(
+                TELEMETRY_PATH, maxBytes=TELEMETRY_MAX_BYTES, backupCount=TELEMETRY_BACKUPS, encoding="utf-8"
+            )
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            listener = logging.handlers.QueueListener(events, file_handler)
+            listener.start()
+            event_logger.addHandler(logging.handlers.QueueHandler(events))
+            _event_logger = event_logger
+        return _event_logger
+
+def record_span(name, seconds, outcome="ok", attributes=None, sample_rate=None):
+    """
+    Count a finished span, add its duration to the histogram and, if sampled, write it as a JSONL event.
+    """
+    increment("spans_total", span=name, outcome=outcome)
+    observe("span_seconds", seconds, span=name)
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    if TELEMETRY_BACKEND == "off" or random.random() >= rate:
+        return
+    event = {"ts": round(time.time(), 3), "span": name, "duration_ms": round(seconds * 1000, 3), "outcome": outcome}
+    if attributes:
+        event.update(attributes)
+    try:
+        _events().info(json.dumps(event, default=str))
+    except OSError as e:
+        logger.warning(f"Failed to record telemetry event: {str(e)}")
+
+@contextmanager
+def span(name, sample_rate=None, **attributes):
+    """
+    Time the enclosed block as span `name`. The yielded dict can be filled with more attributes;
+    an exception marks the span as an error and is re-raised.
+    """
+    started = time.perf_counter()
+    attributes = dict(attributes)
+    outcome = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        outcome = "error"
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        record_span(name, time.perf_counter() - started, outcome, attributes, sample_rate)
+
+def record_llm_call(model, prompt, response_text, usage=None, cached=False, outcome="success"):
+    """
+    Count one LLM completion: tokens (from the provider's usage when given, else estimated) and cost.
+    Returns the attributes to attach to the call's span.
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(prompt)
+    completion_tokens = usage.get("completion_tokens") or estimate_tokens(response_text)
+    increment("llm_requests_total", model=model, outcome=outcome, cached=str(cached).lower())
+    attributes = {"model": model, "cached": cached, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+    if not cached and outcome == "success":
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        increment("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+        increment("llm_tokens_total", completion_tokens, model=model, kind="completion")
+        increment("llm_cost_usd_total", cost, model=model)
+        attributes["cost_usd"] = round(cost, 6)
+    return attributes
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def render_prometheus():
+    """
+    All counters and histograms in the Prometheus text exposition format.
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(value[0]), value[1], value[2]) for key, value in _histograms.items()}
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{METRIC_PREFIX}_{name}{_labels(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} histogram")
+        for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{METRIC_PREFIX}_{name}_bucket{_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}_{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{METRIC_PREFIX}_{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+_server = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=TELEMETRY_PORT):
+    """
+    Serve render_prometheus() at http://0.0.0.0:<port>/metrics from a background thread.
+    Does nothing when no port is configured or the server is already running.
+    """
+    global _server, _server_attempted
+    if not port:
+        return None
+    with _server_lock:
+        if _server_attempted:
+            return _server
+        _server_attempted = True
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+        except OSError as e:
+            # Another process on this node already serves the port
+            logger.warning(f"Metrics server not started on port {port}: {str(e)}")
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Serving Prometheus metrics on port {port}.")
+        return _server
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the question bank, caches and progress store of test runs out of the real data directory
+os.environ.setdefault("EXAM_BUDDY_DATA_DIR", tempfile.mkdtemp(prefix="exam_buddy_tests_"))
+os.environ.setdefault("TELEMETRY_BACKEND", "off")
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import mock_test
+from question_stream import QuestionStream
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+QUESTIONS = [
+    {"question": f"Question {i}?", "options": ["A", "B", "C", "D"], "correct_answer": "A", "explanation": "Because A."}
+    for i in range(3)
+]
+
+@pytest.fixture
+def app(monkeypatch):
+    # Serve a fixed test instead of calling the LLM; app.py imports these when the test starts
+    monkeypatch.setattr(mock_test, "open_mock_test", lambda num_questions=5: QuestionStream.from_list([dict(q) for q in QUESTIONS]))
+    monkeypatch.setattr(mock_test, "explain_wrong_answers", lambda answers: None)
+    return AppTest.from_file(APP, default_timeout=30).run()
+
+def click(app, label):
+    next(button for button in app.button if button.label == label).click().run()
+    assert not app.exception
+
+def shown(app, prefix):
+    return [markdown.value for markdown in app.markdown if markdown.value.startswith(prefix)]
+
+def test_submit_moves_to_the_next_question(app):
+    click(app, "Start Mock Test")
+    assert shown(app, "**Question") == ["**Question 1/3:** Question 0?"]
+    app.radio[0].set_value("B")
+    click(app, "Submit Answer")
+    assert shown(app, "**Question") == ["**Question 2/3:** Question 1?"]
+    assert app.session_state.answers[0]["score"] == 0
+
+def test_completed_test_shows_score_and_restarts(app):
+    click(app, "Start Mock Test")
+    for _ in QUESTIONS:
+        app.radio[0].set_value("A")
+        click(app, "Submit Answer")
+    assert shown(app, "Your Score") == ["Your Score: 3/3"]
+    click(app, "Restart Mock Test")
+    assert [button.label for button in app.button if button.label == "Start Mock Test"]
+    assert not shown(app, "**Question")
+
+def test_missing_api_key_keeps_the_schedule_section(monkeypatch):
+    def no_key(num_questions=5):
+        raise KeyError("EURIAI_API_KEY")
+    monkeypatch.setattr(mock_test, "open_mock_test", no_key)
+    app = AppTest.from_file(APP, default_timeout=30).run()
+    click(app, "Start Mock Test")
+    assert "EURIAI_API_KEY not found" in app.error[0].value
+    assert [button.label for button in app.button if button.label == "Generate Revised Schedule"]
+
+def test_failed_feedback_is_requested_once_per_attempt(app, monkeypatch):
+    calls = []
+    def failing_feedback(answers):
+        calls.append(len(answers))
+        return "Could not fetch detailed feedback: timeout"
+    monkeypatch.setattr(mock_test, "explain_wrong_answers", failing_feedback)
+    click(app, "Start Mock Test")
+    for _ in QUESTIONS:
+        app.radio[0].set_value("B")
+        click(app, "Submit Answer")
+    assert calls == [3]
+    assert app.warning[0].value == "Could not fetch detailed feedback: timeout"
+    click(app, "Restart Mock Test")
+    click(app, "Start Mock Test")
+    for _ in QUESTIONS:
+        click(app, "Submit Answer")
+    assert calls == [3, 3]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from dedup import DUPLICATE_THRESHOLD, SAME_OPTIONS_THRESHOLD, QuestionDeduplicator, option_set, shingles, signature
+
+S3_QUESTION = {
+    "question": "A company wants to store infrequently accessed backups durably at the lowest possible cost "
+                "for several years. Which Amazon S3 storage class should it choose?",
+    "options": ["S3 Standard", "S3 Glacier Deep Archive", "S3 One Zone-IA", "S3 Intelligent-Tiering"]
+}
+# One word changed: well above DUPLICATE_THRESHOLD
+REWORDED = dict(S3_QUESTION, question=S3_QUESTION["question"].replace("infrequently", "rarely"))
+# Several words changed: between SAME_OPTIONS_THRESHOLD and DUPLICATE_THRESHOLD
+PARAPHRASED = dict(
+    S3_QUESTION,
+    question="A startup wants to store infrequently accessed backups durably at the lowest possible cost "
+             "for many years. Which Amazon S3 storage class should it choose?"
+)
+UNRELATED = {
+    "question": "Which AWS service lets you define infrastructure as code templates?",
+    "options": ["AWS CloudFormation", "Amazon CloudWatch", "AWS Config", "AWS Trusted Advisor"]
+}
+
+def estimated_similarity(a, b):
+    return float(np.mean(signature(a) == signature(b)))
+
+def jaccard(a, b):
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+def test_signature_is_deterministic_and_ignores_case_punctuation_and_option_order():
+    variant = {
+        "question": S3_QUESTION["question"].upper().replace("?", " ?!"),
+        "options": list(reversed(S3_QUESTION["options"]))
+    }
+    assert np.array_equal(signature(S3_QUESTION), signature(variant))
+    assert option_set(["S3  Standard!", "s3 one zone-ia"]) == option_set(["S3 One Zone IA", "s3 standard"])
+
+@pytest.mark.parametrize("other", [REWORDED, PARAPHRASED, UNRELATED])
+def test_minhash_estimates_shingle_jaccard(other):
+    assert abs(estimated_similarity(S3_QUESTION, other) - jaccard(S3_QUESTION, other)) < 0.15
+
+def test_empty_question_has_a_signature():
+    assert signature({}).shape == signature(S3_QUESTION).shape
+
+def test_exact_and_lightly_reworded_questions_are_duplicates():
+    assert estimated_similarity(S3_QUESTION, REWORDED) >= DUPLICATE_THRESHOLD
+    seen = QuestionDeduplicator()
+    assert seen.check_and_add("original", S3_QUESTION)
+    assert not seen.check_and_add("copy", dict(S3_QUESTION))
+    assert seen.find_duplicate(REWORDED) == "original"
+    assert len(seen) == 1
+
+def test_paraphrase_is_a_duplicate_only_with_the_same_options():
+    assert SAME_OPTIONS_THRESHOLD <= estimated_similarity(S3_QUESTION, PARAPHRASED) < DUPLICATE_THRESHOLD
+    seen = QuestionDeduplicator()
+    seen.add("original", S3_QUESTION)
+    assert seen.find_duplicate(PARAPHRASED) == "original"
+    other_options = dict(PARAPHRASED, options=["Amazon EBS", "Amazon EFS", "Amazon FSx", "AWS Backup"])
+    assert estimated_similarity(S3_QUESTION, other_options) < SAME_OPTIONS_THRESHOLD
+    assert seen.find_duplicate(other_options) is None
+
+def test_unrelated_questions_are_kept():
+    seen = QuestionDeduplicator()
+    assert seen.check_and_add(1, S3_QUESTION)
+    assert seen.check_and_add(2, UNRELATED)
+    assert len(seen) == 2
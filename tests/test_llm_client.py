@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import llm_client
+from llm_client import CircuitBreaker, CircuitOpenError, ResilientLLMClient, TokenBucket
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+class FakeClient:
+    """
+    Raises the queued errors in turn, then answers every call.
+    """
+
+    model = "fake"
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"choices": [{"message": {"content": "ok"}}]}
+
+    def stream_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+        self.calls += 1
+        for i in range(3):
+            yield f"chunk {i}"
+
+def resilient(client, breaker=None, max_retries=3, max_concurrency=4):
+    return ResilientLLMClient(
+        client,
+        rate_limiter=TokenBucket(rate=1e6, capacity=1e6),
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+        breaker=breaker or CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        base_delay=0,
+        max_delay=0
+    )
+
+def test_breaker_opens_after_consecutive_failures_and_a_success_resets_the_count():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one trial at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and not breaker.is_open
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+def test_released_trial_lets_the_next_call_try_again():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow()
+
+def test_retried_transient_errors_then_success_count_no_failure():
+    client = FakeClient(http_error(503), requests.Timeout())
+    llm = resilient(client)
+    assert llm.generate_completion("prompt", use_cache=False)["choices"][0]["message"]["content"] == "ok"
+    assert client.calls == 3
+    assert llm.healthy
+
+def test_exhausted_retries_count_one_failure_per_call():
+    client = FakeClient(*[http_error(429)] * 4)
+    llm = resilient(client, max_retries=3)
+    with pytest.raises(requests.HTTPError):
+        llm.generate_completion("prompt", use_cache=False)
+    assert client.calls == 4
+    # Threshold 2: one exhausted call is one failure, so the circuit is still closed
+    assert llm.healthy
+    client.errors = [http_error(500)] * 4
+    with pytest.raises(requests.HTTPError):
+        llm.generate_completion("prompt", use_cache=False)
+    assert not llm.healthy
+    with pytest.raises(CircuitOpenError):
+        llm.generate_completion("prompt", use_cache=False)
+
+def test_client_errors_are_not_retried_or_counted():
+    client = FakeClient(*[http_error(400)] * 5)
+    llm = resilient(client)
+    for _ in range(5):
+        with pytest.raises(requests.HTTPError):
+            llm.generate_completion("prompt", use_cache=False)
+    assert client.calls == 5
+    assert llm.healthy
+
+def test_rejected_half_open_trial_does_not_wedge_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    llm = resilient(FakeClient(http_error(400)), breaker=breaker)
+    with pytest.raises(requests.HTTPError):
+        llm.generate_completion("prompt", use_cache=False)
+    assert llm.generate_completion("prompt", use_cache=False)["choices"][0]["message"]["content"] == "ok"
+    assert llm.healthy
+
+def test_stream_does_not_hold_the_concurrency_slot_while_the_consumer_waits():
+    llm = resilient(FakeClient(), max_concurrency=1)
+    stream = llm.stream_completion("prompt")
+    assert next(stream) == "chunk 0"
+    assert next(stream) == "chunk 1"
+    # The first stream is paused mid-way; another call must still get the only slot
+    finished = threading.Event()
+    threading.Thread(target=lambda: (llm.generate_completion("prompt", use_cache=False), finished.set()), daemon=True).start()
+    assert finished.wait(2)
+    stream.close()
+
+def test_closing_a_stream_closes_the_provider_stream():
+    closed = threading.Event()
+
+    class ClosingClient(FakeClient):
+        def stream_completion(self, prompt, temperature=0.7, max_tokens=500, **options):
+            try:
+                yield from super().stream_completion(prompt)
+            finally:
+                closed.set()
+
+    stream = resilient(ClosingClient()).stream_completion("prompt")
+    next(stream)
+    stream.close()
+    assert closed.is_set()
+
+def test_a_stream_closed_early_is_still_recorded(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_client.telemetry, "record_llm_call", lambda *args, **kwargs: recorded.append(kwargs) or {})
+    stream = resilient(FakeClient()).stream_completion("prompt")
+    next(stream)
+    stream.close()
+    assert recorded == [{"usage": {"completion_tokens": 2}}]
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from llm_parsing import JsonArrayStreamParser, iter_stream_questions, parse_json_array, parse_stats
+
+QUESTIONS = [
+    {
+        "question": 'Which service stores objects such as "logs/{date}.json" durably?',
+        "options": ["Amazon S3", "Amazon EBS", "Amazon EFS", "AWS Backup"],
+        "correct_answer": "Amazon S3",
+        "explanation": "Braces and brackets inside strings are text: \"} ]\", as is a trailing backslash \\"
+    },
+    {
+        "question": "Which pillar covers recovering from failures? — café ☃",
+        "options": ["Reliability", "Security", "Sustainability", "Cost Optimization"],
+        "correct_answer": "A",
+        "explanation": "Line one\nline two\ttabbed."
+    }
+]
+# ensure_ascii escapes the non-ASCII characters, so the text also contains \uXXXX escapes
+TEXT = "```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```"
+
+def feed_in_chunks(text, size):
+    parser = JsonArrayStreamParser()
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return parser, items
+
+def sse(text, size):
+    for start in range(0, len(text), size):
+        yield "data: " + json.dumps({"choices": [{"delta": {"content": text[start:start + size]}}]})
+    yield "data: [DONE]"
+
+def test_every_split_point_gives_the_same_objects():
+    # Covers splits inside strings, between a backslash and the character it escapes, and inside \uXXXX
+    assert '\\"' in TEXT and "\\\\" in TEXT and "\\u2603" in TEXT
+    for split in range(len(TEXT) + 1):
+        parser = JsonArrayStreamParser()
+        items = parser.feed(TEXT[:split]) + parser.feed(TEXT[split:])
+        assert items == QUESTIONS, f"split at {split}"
+        assert parser.skipped == 0
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 40])
+def test_small_chunks_give_the_same_objects(size):
+    parser, items = feed_in_chunks(TEXT, size)
+    assert items == QUESTIONS
+    assert parser.skipped == 0
+
+def test_objects_are_returned_as_soon_as_they_close():
+    first_end = TEXT.index("\n  },") + len("\n  }")
+    parser = JsonArrayStreamParser()
+    assert parser.feed(TEXT[:first_end - 1]) == []
+    assert parser.feed(TEXT[first_end - 1:first_end]) == QUESTIONS[:1]
+
+def test_malformed_element_is_repaired_or_skipped_without_losing_the_rest():
+    text = '[{"a": 1,}, {"b": “two”}, {"c": oops}, {"d": "}"}]'
+    parser, items = feed_in_chunks(text, 3)
+    assert items == [{"a": 1}, {"b": "two"}, {"d": "}"}]
+    assert (parser.repaired, parser.skipped) == (2, 1)
+
+@pytest.mark.parametrize("size", [1, 5, 40])
+def test_iter_stream_questions_normalizes_and_validates(size):
+    questions = list(iter_stream_questions(sse(TEXT, size), answer_key="correct_answer"))
+    assert [question["correct_answer"] for question in questions] == ["Amazon S3", "Reliability"]
+    assert questions[0]["explanation"] == QUESTIONS[0]["explanation"]
+
+def test_a_stream_closed_early_is_still_counted():
+    before = parse_stats.snapshot()
+    questions = iter_stream_questions(sse(TEXT, 5), answer_key="correct_answer")
+    next(questions)
+    questions.close()
+    after = parse_stats.snapshot()
+    assert after["clean"] + after["salvaged"] + after["lost"] == before["clean"] + before["salvaged"] + before["lost"] + 1
+
+def test_parse_json_array_strict_repaired_and_truncated():
+    assert parse_json_array(TEXT) == (QUESTIONS, False, 0)
+    assert parse_json_array('Here you go: [{"a": 1}, {"b": 2},]') == ([{"a": 1}, {"b": 2}], True, 0)
+    # Output cut off mid-string: the complete objects are salvaged
+    truncated = TEXT[:TEXT.index("Line one") + 4]
+    assert parse_json_array(truncated) == (QUESTIONS[:1], True, 0)
+    assert parse_json_array("no array here") == ([], False, 0)
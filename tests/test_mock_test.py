@@ -0,0 +1,41 @@
+import uuid
+
+import mock_test
+
+class FeedbackClient:
+    def __init__(self, content=None, error=None):
+        self.content = content
+        self.error = error
+        self.calls = 0
+
+    def generate_completion(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"choices": [{"message": {"content": self.content}}]}
+
+def wrong_answers(count):
+    # Unique questions, so no feedback is cached from another test
+    return [
+        {"question": f"Question {uuid.uuid4().hex}?", "user_answer": "B", "correct_answer": "A",
+         "explanation": "Default.", "score": 0}
+        for _ in range(count)
+    ]
+
+def test_partial_feedback_is_applied_and_reported(monkeypatch):
+    client = FeedbackClient('[{"id": 1, "explanation": "B is a distractor."}]')
+    monkeypatch.setattr(mock_test, "get_client", lambda: client)
+    answers = wrong_answers(2)
+    assert mock_test.explain_wrong_answers(answers) == "Detailed feedback is unavailable for 1 of your incorrect answers."
+    assert answers[0]["explanation"] == "B is a distractor."
+    assert answers[1]["explanation"] == "Default."
+    # The explanation that arrived is cached, so only the missing one is requested again
+    client.content = '[{"id": 1, "explanation": "Still wrong."}]'
+    assert mock_test.explain_wrong_answers(answers) is None
+    assert answers[1]["explanation"] == "Still wrong."
+
+def test_failed_feedback_request_returns_a_message(monkeypatch):
+    monkeypatch.setattr(mock_test, "get_client", lambda: FeedbackClient(error=RuntimeError("timeout")))
+    answers = wrong_answers(1)
+    assert mock_test.explain_wrong_answers(answers) == "Could not fetch detailed feedback: timeout"
+    assert answers[0]["explanation"] == "Default."
@@ -0,0 +1,23 @@
+import pytest
+import requests
+
+import notes_snapshot
+from notes_snapshot import SNAPSHOT_FORMAT, _write_snapshot, load_notes
+
+URL = "https://example.com/notes"
+
+@pytest.fixture
+def offline(monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+    monkeypatch.setattr(notes_snapshot.requests, "get", fail)
+
+def test_failed_fetch_without_a_snapshot_raises(offline, tmp_path):
+    with pytest.raises(requests.ConnectionError):
+        load_notes(URL, path=str(tmp_path / "notes.json"))
+
+def test_failed_refresh_falls_back_to_the_stale_snapshot(offline, tmp_path):
+    path = str(tmp_path / "notes.json")
+    snapshot = {"format": SNAPSHOT_FORMAT, "url": URL, "fetched_at": 0, "version": "v1", "text": "EC2 S3"}
+    _write_snapshot(snapshot, path)
+    assert load_notes(URL, ttl=60, path=path) == snapshot
@@ -0,0 +1,55 @@
+import sqlite3
+import uuid
+
+import pytest
+
+import question_bank
+
+QUESTION = {
+    "question": "A company wants to store infrequently accessed backups durably at the lowest possible cost "
+                "for several years. Which Amazon S3 storage class should it choose?",
+    "options": ["S3 Standard", "S3 Glacier Deep Archive", "S3 One Zone-IA", "S3 Intelligent-Tiering"],
+    "answer": "S3 Glacier Deep Archive",
+    "explanation": "Deep Archive is the cheapest class for long-term retention."
+}
+REWORDED = dict(QUESTION, question=QUESTION["question"].replace("infrequently", "rarely"))
+OTHER = {
+    "question": "Which AWS service lets you define infrastructure as code templates?",
+    "options": ["AWS CloudFormation", "Amazon CloudWatch", "AWS Config", "AWS Trusted Advisor"],
+    "answer": "AWS CloudFormation",
+    "explanation": "CloudFormation provisions resources from templates."
+}
+
+@pytest.fixture
+def source():
+    return f"test-{uuid.uuid4().hex}"
+
+def test_add_new_questions_drops_near_duplicates_of_earlier_generations(source):
+    assert question_bank.add_new_questions([QUESTION], source) == [QUESTION]
+    assert question_bank.add_new_questions([REWORDED, OTHER], source) == [OTHER]
+    # Near-duplicates within one batch are dropped too
+    assert question_bank.add_new_questions([dict(OTHER, question=OTHER["question"] + " "), {"question": "?"}], source) == []
+    assert question_bank.count_questions(source) == 2
+
+def test_failed_insert_does_not_index_the_questions(source, monkeypatch):
+    question_bank.get_deduplicator(source)
+    # Fingerprints are unique across sources, so this test needs a question of its own
+    question = dict(OTHER, question=f"{OTHER['question']} ({source})")
+
+    class BrokenConnection:
+        total_changes = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def executemany(self, *args):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(question_bank, "_connect", BrokenConnection)
+        assert question_bank.add_questions([question], source) == 0
+    assert len(question_bank.get_deduplicator(source)) == 0
+    assert question_bank.add_questions([question], source) == 1
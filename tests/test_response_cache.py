@@ -0,0 +1,51 @@
+import threading
+
+from response_cache import MemoryBackend, ResponseCache, SqliteBackend
+
+def total_size(backend):
+    return backend._connect().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+def test_replacing_a_key_does_not_grow_the_tracked_size(tmp_path):
+    backend = SqliteBackend(path=str(tmp_path / "cache.db"), max_bytes=1000)
+    backend.set("a", "x" * 100)
+    backend.set("b", "y" * 100)
+    for _ in range(20):
+        backend.set("a", "z" * 150)
+    assert backend.size() == total_size(backend) == 250
+    assert backend.get("b", max_age=60) == "y" * 100
+
+def test_eviction_drops_least_recently_used_entries_below_the_limit(tmp_path):
+    backend = SqliteBackend(path=str(tmp_path / "cache.db"), max_bytes=1000)
+    for i in range(12):
+        backend.set(f"key{i}", "v" * 100)
+    assert total_size(backend) <= 1000
+    assert backend.size() == total_size(backend)
+    assert backend.get("key0", max_age=60) is None
+    assert backend.get("key11", max_age=60) == "v" * 100
+
+def test_size_is_shared_by_backends_on_the_same_database(tmp_path):
+    # Two backends on one file stand in for two processes
+    path = str(tmp_path / "cache.db")
+    first = SqliteBackend(path=path, max_bytes=1000)
+    second = SqliteBackend(path=path, max_bytes=1000)
+    for i in range(6):
+        first.set(f"first{i}", "v" * 100)
+        second.set(f"second{i}", "v" * 100)
+    assert first.size() == second.size() == total_size(first) <= 1000
+    assert second.get("second5", max_age=60) == "v" * 100
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = ResponseCache(MemoryBackend())
+    cache.set("hit", {"text": "cached"})
+
+    def lookups():
+        for _ in range(2000):
+            cache.get("hit")
+            cache.get("miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats() == {"hits": 16000, "misses": 16000, "errors": 0, "hit_rate": 0.5}
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from schedule_optimizer import optimize_schedule
+
+def schedule(*days):
+    return pd.DataFrame({
+        "Date": [f"2025-05-{day:02d}" for day in range(1, len(days) + 1)],
+        "Day": ["Mon"] * len(days),
+        "Study Hours": [hours for hours, _ in days],
+        "Topics": [topics for _, topics in days]
+    })
+
+def test_overflow_is_carried_into_lighter_days_before_the_exam():
+    revised = optimize_schedule(schedule(("6", "EC2"), ("1", "S3"), ("", "EXAM DAY")))
+    assert revised["Revised Study Hours"][0].startswith("4 h study")
+    assert revised["Revised Study Hours"][1].startswith("3 h study")
+    assert "Catch-up: 2 h carried over" in revised["Tasks"][1]
+    assert revised["Revised Study Hours"][2] == "Exam day: light recall only"
+    assert not revised["Tasks"].str.contains("did not fit").any()
+
+def test_leftover_before_a_mid_schedule_exam_is_noted_on_the_last_study_day():
+    revised = optimize_schedule(schedule(
+        ("9", "EC2"), ("4", "S3"), ("", "CLF-C01 EXAM DAY"), ("2", "Bedrock"), ("5", "SageMaker")
+    ))
+    notes = revised["Tasks"].str.extract(r"Note: (\S+) h of planned material did not fit", expand=False)
+    assert notes[1] == "5"
+    # The second segment has no exam after it; its leftover goes on its own last day
+    assert notes[4] == "1"
+    assert notes[[0, 2, 3]].isna().all()
+    # The day after an exam does not review the exam day
+    assert not revised["Tasks"][3].startswith("Review")
@@ -0,0 +1,76 @@
+import uuid
+
+import pytest
+
+from spaced_repetition import (
+    AGAIN, DAY_SECONDS, EASY, EASY_BONUS, FIRST_INTERVAL_DAYS, GOOD, HARD, HARD_FACTOR, INITIAL_EASE,
+    MIN_EASE, RELEARN_SECONDS, SECOND_INTERVAL_DAYS, CardState, FlashcardScheduler, review
+)
+
+NOW = 1_000_000.0
+
+def reviewed(*grades):
+    state = CardState()
+    for grade in grades:
+        review(state, grade, NOW)
+    return state
+
+def test_good_reviews_follow_the_sm2_intervals():
+    intervals = []
+    state = CardState()
+    for _ in range(4):
+        review(state, GOOD, NOW)
+        intervals.append(state.interval_days)
+    assert intervals == pytest.approx([
+        FIRST_INTERVAL_DAYS,
+        SECOND_INTERVAL_DAYS,
+        SECOND_INTERVAL_DAYS * INITIAL_EASE,
+        SECOND_INTERVAL_DAYS * INITIAL_EASE ** 2
+    ])
+    assert state.ease == INITIAL_EASE
+    assert state.due == NOW + intervals[-1] * DAY_SECONDS
+
+def test_hard_and_easy_adjust_interval_and_ease():
+    hard = reviewed(GOOD, GOOD, HARD)
+    assert hard.interval_days == pytest.approx(SECOND_INTERVAL_DAYS * HARD_FACTOR)
+    assert hard.ease == pytest.approx(INITIAL_EASE - 0.15)
+    # Hard on a new card still waits at least the first interval
+    assert reviewed(HARD).interval_days == FIRST_INTERVAL_DAYS
+    easy = reviewed(GOOD, GOOD, EASY)
+    assert easy.interval_days == pytest.approx(SECOND_INTERVAL_DAYS * INITIAL_EASE * EASY_BONUS)
+    assert easy.ease == pytest.approx(INITIAL_EASE + 0.15)
+
+def test_again_relearns_the_card_and_restarts_the_intervals():
+    state = reviewed(GOOD, GOOD, GOOD, AGAIN)
+    assert (state.reps, state.lapses, state.interval_days) == (0, 1, 0.0)
+    assert state.due == NOW + RELEARN_SECONDS
+    assert state.ease == pytest.approx(INITIAL_EASE - 0.2)
+    review(state, GOOD, NOW)
+    assert state.interval_days == FIRST_INTERVAL_DAYS
+
+@pytest.mark.parametrize("grade", [AGAIN, HARD])
+def test_ease_never_drops_below_the_floor(grade):
+    state = reviewed(*[grade] * 20)
+    assert state.ease == MIN_EASE
+    # The floor still lets the interval grow on later reviews
+    review(state, GOOD, NOW)
+    before = state.interval_days
+    review(state, GOOD, NOW)
+    assert state.interval_days >= before
+
+def test_scheduler_serves_the_card_due_soonest_and_persists_grades():
+    learner = f"test-{uuid.uuid4().hex}"
+    scheduler = FlashcardScheduler(learner, ["a", "b", "c"])
+    assert scheduler.next_card() == ("a", 0.0)
+    scheduler.grade("a", GOOD, now=NOW)
+    scheduler.grade("b", AGAIN, now=NOW)
+    assert scheduler.next_card() == ("c", 0.0)
+    scheduler.grade("c", EASY, now=NOW)
+    assert scheduler.next_card() == ("b", NOW + RELEARN_SECONDS)
+    assert scheduler.counts(now=NOW) == (0, 0)
+    with pytest.raises(ValueError):
+        scheduler.grade("a", "Perfect", now=NOW)
+
+    reloaded = FlashcardScheduler(learner, ["a", "b", "c", "d"])
+    assert reloaded.next_card() == ("d", 0.0)
+    assert reloaded.counts(now=NOW + RELEARN_SECONDS) == (2, 1)